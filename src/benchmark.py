@@ -0,0 +1,445 @@
+"""
+DRDO Air Defence ML Project
+Load test and latency benchmark for the API.
+
+Drives the app in-process (httpx over ASGI, no network) or a running
+server, with N concurrent clients replaying a weighted request mix, and
+reports throughput plus p50/p95/p99 latency per route.
+
+    python -m src.benchmark run --scales 1,10,100 --concurrency 16
+    python -m src.benchmark run --url http://localhost:8000
+    python -m src.benchmark run --save-baseline bench.json
+    python -m src.benchmark run --baseline bench.json   # exit 1 on regression
+    python -m src.benchmark forest                      # flat vs sklearn per batch size
+
+In-process runs regenerate the dataset at each scale (systems and
+scenarios repeated scale times under new ids/names) and hot-reload it
+through the registry. For a server, generate the data first and start the
+server on it:
+
+    python -m src.benchmark make-data --scale 100 --out /tmp/airdef-x100
+    AIRDEF_DATA_DIR=/tmp/airdef-x100 uvicorn src.main:app
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from urllib.parse import quote
+
+import httpx
+import numpy as np
+import pandas as pd
+
+from .schema import DATA_FILES
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Regressions smaller than this are noise, whatever the relative change
+MIN_REGRESSION_MS = 2.0
+# Routes with fewer samples than this are too noisy to compare percentiles
+MIN_SAMPLES = 20
+# /api/systems pages walked by prime() for cursors the mix can replay
+CURSOR_PAGES = 20
+PAGE_SIZE = 50
+NDJSON = "application/x-ndjson"
+
+
+# Synthetic data
+def make_data(data_dir: str, scale: int, out: str) -> str:
+    """
+    Copy of data_dir with systems and scenarios repeated scale times.
+    Copy k > 0 gets " #k" on system names and "-xk" on ids so name lookups
+    stay unique; countries are unchanged (the models know only those).
+    """
+    os.makedirs(out, exist_ok=True)
+    shutil.copy(os.path.join(data_dir, DATA_FILES["countries"]), os.path.join(out, DATA_FILES["countries"]))
+
+    systems = pd.read_csv(os.path.join(data_dir, DATA_FILES["systems"]))
+    copies = [systems]
+    for k in range(1, scale):
+        copy = systems.copy()
+        copy["system_id"] = copy["system_id"].astype(str) + f"-x{k}"
+        copy["system_name"] = copy["system_name"] + f" #{k}"
+        copies.append(copy)
+    pd.concat(copies, ignore_index=True).to_csv(os.path.join(out, DATA_FILES["systems"]), index=False)
+
+    scenarios = pd.read_csv(os.path.join(data_dir, DATA_FILES["scenarios"]))
+    copies = [scenarios]
+    for k in range(1, scale):
+        copy = scenarios.copy()
+        copy["scenario_id"] = copy["scenario_id"].astype(str) + f"-x{k}"
+        copies.append(copy)
+    pd.concat(copies, ignore_index=True).to_csv(os.path.join(out, DATA_FILES["scenarios"]), index=False)
+    return out
+
+
+# Request mix
+async def prime(client: httpx.AsyncClient, countries: list) -> dict:
+    """
+    State the mix replays but cannot make up: next_cursor values from
+    walking /api/systems, and the ETag of a few cached responses (valid
+    until the data version changes, so prime again after a reload).
+    """
+    cursors, cursor = [], None
+    for _ in range(CURSOR_PAGES):
+        query = f"limit={PAGE_SIZE}" + (f"&cursor={quote(cursor, safe='')}" if cursor else "")
+        cursor = (await client.get(f"/api/systems?{query}")).json().get("next_cursor")
+        if not cursor:
+            break
+        cursors.append(cursor)
+
+    etags = {}
+    paths = ["/api/countries", "/api/stats/overview", "/api/map/zones"]
+    paths += [f"/api/country/{quote(c, safe='')}/insights" for c in countries[:5]]
+    paths += [f"/api/systems?country={quote(c, safe='')}" for c in countries[:5]]
+    for path in paths:
+        etag = (await client.get(path)).headers.get("etag")
+        if etag:
+            etags[path] = etag
+    return {"cursors": cursors, "etags": etags}
+
+
+def build_mix(countries: list, systems: list, system_ids: list, primed: dict) -> list:
+    """
+    [(route label, weight, make(rng) -> (method, path, body, headers))].
+    Routes are labelled by template so per-route stats aggregate over
+    parameters. primed comes from prime(); routes needing state it could
+    not find are left out.
+    """
+    # A "/" in a path segment is decoded before routing, so by-name cannot
+    # address those systems; they still appear in query params and bodies
+    path_systems = [name for name in systems if "/" not in name] or systems
+    path_ids = [i for i in system_ids if "/" not in i] or system_ids
+
+    def country(rng):
+        return quote(rng.choice(countries), safe="")
+
+    def system(rng):
+        return quote(rng.choice(path_systems), safe="")
+
+    def pair(rng):
+        a, d = rng.sample(countries, 2)
+        return {"attacker_country": a, "defender_country": d}
+
+    def pair_query(rng):
+        return "&".join(f"{k}={quote(v, safe='')}" for k, v in pair(rng).items())
+
+    def simulation(rng):
+        return {**pair(rng), "axes": [
+            {"side": "attacker", "change": "fighter_count", "start": 0, "stop": 200, "step": rng.choice([10, 20])},
+            {"side": "defender", "change": "sam_count", "start": 0, "stop": 100, "step": 10},
+        ]}
+
+    mix = [
+        ("GET /", 1, lambda r: ("GET", "/", None)),
+        ("GET /api/stats/overview", 2, lambda r: ("GET", "/api/stats/overview", None)),
+        ("GET /api/countries", 2, lambda r: ("GET", "/api/countries", None)),
+        ("GET /api/countries/{name}", 4, lambda r: ("GET", f"/api/countries/{country(r)}", None)),
+        ("GET /api/countries/names", 3, lambda r: ("GET", f"/api/countries/names?q={quote(r.choice(countries)[:2], safe='')}", None)),
+        ("GET /api/systems", 3, lambda r: (
+            "GET", f"/api/systems?country={country(r)}&min_threat={r.randint(0, 5)}", None)),
+        ("GET /api/systems?limit&fields", 3, lambda r: (
+            "GET", f"/api/systems?limit={PAGE_SIZE}&offset={r.randint(0, 20) * PAGE_SIZE}"
+                   "&fields=system_id,system_name,threat_level", None)),
+        ("GET /api/systems?fields&include_prediction", 1, lambda r: (
+            "GET", f"/api/systems?country={country(r)}&include_prediction=true"
+                   "&fields=system_name,predicted_classification,prediction_confidence", None)),
+        ("GET /api/systems ndjson", 2, lambda r: (
+            "GET", f"/api/systems?country={country(r)}", None, {"Accept": NDJSON})),
+        ("GET /api/systems/names", 3, lambda r: ("GET", f"/api/systems/names?q={quote(r.choice(systems)[:2], safe='')}", None)),
+        ("GET /api/systems/by-name/{name}", 3, lambda r: ("GET", f"/api/systems/by-name/{system(r)}", None)),
+        ("GET /api/systems/{id}/similar", 3, lambda r: (
+            "GET", f"/api/systems/{quote(r.choice(path_ids), safe='')}/similar?k={r.choice([5, 10, 25])}"
+                   + (f"&country={country(r)}" if r.random() < 0.3 else ""), None)),
+        ("GET /api/compare", 4, lambda r: (
+            "GET", "/api/compare?country1={}&country2={}".format(*(quote(c, safe="") for c in r.sample(countries, 2))),
+            None)),
+        ("GET /api/compare/multi", 2, lambda r: (
+            "GET", "/api/compare/multi?countries=" + ",".join(
+                quote(c, safe="") for c in r.sample(countries, min(r.randint(3, 5), len(countries)))), None)),
+        ("GET /api/map/zones", 1, lambda r: ("GET", "/api/map/zones", None)),
+        ("GET /api/country/{name}/insights", 4, lambda r: ("GET", f"/api/country/{country(r)}/insights", None)),
+        ("GET /api/predict/war", 6, lambda r: ("GET", f"/api/predict/war?{pair_query(r)}", None)),
+        ("GET /api/predict/war?samples", 1, lambda r: (
+            "GET", f"/api/predict/war?{pair_query(r)}&samples={r.choice([1000, 5000])}&seed={r.randint(0, 99)}", None)),
+        ("POST /api/predict/war/batch", 2, lambda r: (
+            "POST", "/api/predict/war/batch", {"pairs": [pair(r) for _ in range(20)]})),
+        ("POST /api/predict/classify-system", 4, lambda r: (
+            "POST", "/api/predict/classify-system", {"system_name": r.choice(systems)})),
+        ("POST /api/predict/classify-system/batch", 2, lambda r: (
+            "POST", "/api/predict/classify-system/batch", {"system_names": r.sample(systems, min(20, len(systems)))})),
+        ("POST /api/simulate/war", 1, lambda r: ("POST", "/api/simulate/war", simulation(r))),
+    ]
+    cursors, etags = primed["cursors"], sorted(primed["etags"].items())
+
+    def revalidate(rng):
+        # A client holding a cached copy: answered 304 with no body
+        path, etag = rng.choice(etags)
+        return "GET", path, None, {"If-None-Match": etag}
+
+    if cursors:
+        mix.append(("GET /api/systems?cursor", 2, lambda r: (
+            "GET", f"/api/systems?limit={PAGE_SIZE}&cursor={quote(r.choice(cursors), safe='')}", None)))
+    if etags:
+        mix.append(("GET (If-None-Match) 304", 3, revalidate))
+    return mix
+
+
+def plan_requests(mix: list, n: int, seed: int, routes: list = None) -> list:
+    """n (label, method, path, body, headers) drawn from the mix by weight, reproducibly."""
+    if routes:
+        mix = [m for m in mix if any(r in m[0] for r in routes)]
+        if not mix:
+            raise SystemExit(f"No routes match {routes}")
+    rng = random.Random(seed)
+    labels = rng.choices(range(len(mix)), weights=[w for _, w, _ in mix], k=n)
+    planned = []
+    for i in labels:
+        method, path, body, *headers = mix[i][2](rng)
+        planned.append((mix[i][0], method, path, body, headers[0] if headers else None))
+    return planned
+
+
+# Tree backends
+def bench_forest(models_dir: str, rows: list, repeat: int) -> tuple:
+    """
+    ({model: [(rows, flat ms, sklearn ms)]}, mismatches): best-of-repeat
+    time of the FlatForest walk and of the sklearn model per batch size,
+    plus the batches where their outputs were not identical.
+    """
+    import joblib
+    from .forest import FlatForest
+    from .registry import MODEL_FILES
+
+    timings, mismatches = {}, []
+    for name in ("model1", "model2", "model3"):
+        path = os.path.join(models_dir, MODEL_FILES[name])
+        if not os.path.exists(path):
+            print(f"{name}: {path} missing, skipped")
+            continue
+        model = joblib.load(path)
+        flat = FlatForest(model)
+        sk_fn = model.predict_proba if flat.is_classifier else model.predict
+        timings[name] = []
+        for n in rows:
+            X = np.random.default_rng(n).normal(0, 1.5, size=(n, flat.n_features_in_))
+            best, outputs = {}, {}
+            for label, fn in (("flat", flat._mean_value), ("sklearn", sk_fn)):
+                best[label] = np.inf
+                for _ in range(repeat):
+                    started = time.perf_counter()
+                    outputs[label] = fn(X)
+                    best[label] = min(best[label], time.perf_counter() - started)
+            if not np.array_equal(outputs["flat"], outputs["sklearn"]):
+                mismatches.append(f"{name} at {n} rows")
+            timings[name].append((n, best["flat"] * 1000, best["sklearn"] * 1000))
+    return timings, mismatches
+
+
+# Runner
+async def drive(client: httpx.AsyncClient, planned: list, concurrency: int) -> tuple:
+    """Replay planned on concurrency clients; return (samples, wall seconds)."""
+    queue = asyncio.Queue()
+    for item in planned:
+        queue.put_nowait(item)
+    samples = []  # (label, status, seconds, response bytes)
+
+    async def worker():
+        while not queue.empty():
+            label, method, path, body, headers = queue.get_nowait()
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, path, json=body, headers=headers)
+                status, size = response.status_code, len(response.content)
+            except httpx.HTTPError:
+                status, size = 0, 0
+            samples.append((label, status, time.perf_counter() - started, size))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return samples, time.perf_counter() - started
+
+
+def summarise(samples: list, wall: float) -> dict:
+    """Per-route and overall count, errors, throughput and latency percentiles (ms)."""
+    by_route = {}
+    for label, status, seconds, size in samples:
+        by_route.setdefault(label, []).append((status, seconds, size))
+    by_route["ALL"] = [(status, seconds, size) for _, status, seconds, size in samples]
+
+    report = {}
+    for label, rows in sorted(by_route.items()):
+        ms = np.array([seconds for _, seconds, _ in rows]) * 1000
+        p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+        report[label] = {
+            "count": len(rows),
+            "errors": sum(1 for status, _, _ in rows if not 200 <= status < 400),  # 304 is a success
+            "rps": round(len(rows) / wall, 1),
+            "mean_ms": round(float(ms.mean()), 2),
+            "p50_ms": round(float(p50), 2),
+            "p95_ms": round(float(p95), 2),
+            "p99_ms": round(float(p99), 2),
+            "avg_bytes": int(np.mean([size for _, _, size in rows])),
+        }
+    return report
+
+
+def print_report(title: str, report: dict):
+    print(f"\n{title}")
+    print(f"{'route':44} {'n':>6} {'err':>4} {'req/s':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'bytes':>9}")
+    for label, r in report.items():
+        print(f"{label:44} {r['count']:6} {r['errors']:4} {r['rps']:8} "
+              f"{r['p50_ms']:8} {r['p95_ms']:8} {r['p99_ms']:8} {r['avg_bytes']:9}")
+
+
+def compare_baseline(results: dict, baseline: dict, tolerance: float) -> list:
+    """Lines describing every route whose p95 or throughput regressed beyond tolerance."""
+    regressions = []
+    for scale, report in results.items():
+        for label, r in report.items():
+            base = baseline.get(scale, {}).get(label)
+            if base is None or min(r["count"], base["count"]) < MIN_SAMPLES:
+                continue
+            if r["p95_ms"] > base["p95_ms"] * (1 + tolerance) and r["p95_ms"] - base["p95_ms"] > MIN_REGRESSION_MS:
+                regressions.append(f"[{scale}] {label}: p95 {base['p95_ms']} -> {r['p95_ms']} ms")
+            if label == "ALL" and r["rps"] < base["rps"] / (1 + tolerance):
+                regressions.append(f"[{scale}] {label}: throughput {base['rps']} -> {r['rps']} req/s")
+            if r["errors"] > base["errors"]:
+                regressions.append(f"[{scale}] {label}: errors {base['errors']} -> {r['errors']}")
+    return regressions
+
+
+async def run_url(args) -> dict:
+    async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout) as client:
+        countries = [c["country"] for c in (await client.get("/api/countries/names?limit=500")).json()["countries"]]
+        records = (await client.get("/api/systems/names?limit=500")).json()["systems"]
+        systems = [s["system_name"] for s in records]
+        system_ids = [str(s["system_id"]) for s in records]
+        planned = plan_requests(
+            build_mix(countries, systems, system_ids, await prime(client, countries)),
+            args.requests, args.seed, args.routes,
+        )
+        await drive(client, planned[:args.warmup], args.concurrency)
+        samples, wall = await drive(client, planned, args.concurrency)
+    return {"server": summarise(samples, wall)}
+
+
+async def run_in_process(args) -> dict:
+    os.environ.setdefault("AIRDEF_WARMUP", "0")  # warmed explicitly below
+    from . import main as api
+
+    registry = api.registry
+    registry.columnar_dir = None  # the synthetic data has no columnar copy
+    results = {}
+    transport = httpx.ASGITransport(app=api.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=args.timeout) as client:
+        for scale in args.scales:
+            workdir = None
+            if scale > 1:
+                workdir = tempfile.mkdtemp(prefix=f"airdef-x{scale}-")
+                registry.data_dir = make_data(api.DATA_DIR, scale, workdir)
+            else:
+                registry.data_dir = api.DATA_DIR
+            try:
+                started = time.perf_counter()
+                # A fresh snapshot even with a model missing (its routes then count as errors)
+                await asyncio.to_thread(registry.load)
+                await asyncio.to_thread(api.warm_snapshot)
+                s = registry.current()
+                print(f"x{scale}: {len(s.systems_df)} systems, {len(s.scenarios_df)} scenarios, "
+                      f"loaded in {time.perf_counter() - started:.1f}s")
+                countries = s.countries_df["country"].tolist()
+                planned = plan_requests(
+                    build_mix(countries, s.systems_df["system_name"].tolist(),
+                              s.systems_df["system_id"].astype(str).tolist(), await prime(client, countries)),
+                    args.requests, args.seed, args.routes,
+                )
+                await drive(client, planned[:args.warmup], args.concurrency)
+                samples, wall = await drive(client, planned, args.concurrency)
+                results[f"x{scale}"] = summarise(samples, wall)
+            finally:
+                if workdir:
+                    shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test and latency benchmark for the API")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Run the benchmark")
+    run.add_argument("--url", help="Benchmark a running server instead of the in-process app")
+    run.add_argument("--scales", default="1",
+                     help="Comma-separated dataset scales for in-process runs, e.g. 1,10,100,1000")
+    run.add_argument("--concurrency", type=int, default=8)
+    run.add_argument("--requests", type=int, default=500, help="Measured requests per scale")
+    run.add_argument("--warmup", type=int, default=50, help="Unmeasured requests first, per scale")
+    run.add_argument("--routes", help="Only routes whose label contains one of these (comma-separated)")
+    run.add_argument("--seed", type=int, default=0)
+    run.add_argument("--timeout", type=float, default=60.0)
+    run.add_argument("--json", help="Write the results here")
+    run.add_argument("--save-baseline", help="Write the results as the new baseline")
+    run.add_argument("--baseline", help="Fail (exit 1) on regressions against this baseline")
+    run.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative slowdown (default 0.25)")
+
+    forest = commands.add_parser("forest", help="Time the flat tree walk against sklearn per batch size")
+    forest.add_argument("--rows", default="1,64,128,256,384,512,768,1024,2048")
+    forest.add_argument("--repeat", type=int, default=5)
+    forest.add_argument("--models-dir", default=os.path.join(BASE_DIR, "models"))
+
+    gen = commands.add_parser("make-data", help="Write a scaled-up copy of data/")
+    gen.add_argument("--scale", type=int, required=True)
+    gen.add_argument("--out", required=True)
+    gen.add_argument("--data-dir", default=os.environ.get("AIRDEF_DATA_DIR", os.path.join(BASE_DIR, "data")))
+
+    args = parser.parse_args()
+    if args.command == "make-data":
+        print(make_data(args.data_dir, args.scale, args.out))
+        return 0
+    if args.command == "forest":
+        from .forest import FLAT_MAX_ROWS
+
+        timings, mismatches = bench_forest(args.models_dir, [int(x) for x in args.rows.split(",")], args.repeat)
+        for name, rows in timings.items():
+            print(f"\n{name}")
+            print(f"{'rows':>6} {'flat ms':>9} {'sklearn ms':>11}")
+            for n, flat_ms, sk_ms in rows:
+                print(f"{n:6} {flat_ms:9.2f} {sk_ms:11.2f}{'  *' if flat_ms < sk_ms else ''}")
+        print(f"\n* flat is faster; FLAT_MAX_ROWS = {FLAT_MAX_ROWS}")
+        for line in mismatches:
+            print(f"MISMATCH: flat and sklearn outputs differ for {line}")
+        return 1 if mismatches else 0
+
+    args.scales = [int(x) for x in args.scales.split(",")]
+    args.routes = args.routes.split(",") if args.routes else None
+    if args.url and args.scales != [1]:
+        parser.error("--scales applies to in-process runs; start the server on make-data output instead")
+
+    results = asyncio.run(run_url(args) if args.url else run_in_process(args))
+    for scale, report in results.items():
+        print_report(f"{scale}  (concurrency {args.concurrency}, {args.requests} requests)", report)
+
+    for path in (args.json, args.save_baseline):
+        if path:
+            with open(path, "w") as fh:
+                json.dump(results, fh, indent=2)
+    if args.baseline:
+        with open(args.baseline) as fh:
+            regressions = compare_baseline(results, json.load(fh), args.tolerance)
+        if regressions:
+            print(f"\nREGRESSIONS vs {args.baseline} (tolerance {args.tolerance:.0%}):")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print(f"\nNo regressions vs {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
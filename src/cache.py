@@ -0,0 +1,70 @@
+"""
+DRDO Air Defence ML Project
+In-process cache of serialized responses for the read-only endpoints.
+"""
+
+from collections import OrderedDict
+import hashlib
+import threading
+
+
+class ResponseCache:
+    """
+    LRU map of (path, normalised query) -> (pre-serialized JSON bytes, ETag).
+
+    Every entry belongs to one data version; call clear() (or store under a
+    new version) when the underlying data changes.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(path: str, query_items) -> tuple:
+        """Query params are order-insensitive; repeated params keep their values."""
+        return (path, tuple(sorted(query_items)))
+
+    def get(self, key):
+        """(body, etag) for key, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, body: bytes, etag: str):
+        with self._lock:
+            self._entries[key] = (body, etag)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def body_etag(version: str, body: bytes) -> str:
+    """Weak validator for one representation: the data version plus a hash of the body."""
+    return f'W/"{version}-{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """True when an If-None-Match header value covers etag (weak comparison)."""
+    if not if_none_match:
+        return False
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*" or tag.removeprefix("W/") == etag.removeprefix("W/"):
+            return True
+    return False
@@ -0,0 +1,65 @@
+"""
+DRDO Air Defence ML Project
+Vectorised feature building and scoring for the system classifier (model 1).
+"""
+
+import numpy as np
+import pandas as pd
+
+from .metrics import span
+
+# Numeric inputs in model1_features.json order; system_type_enc is appended last
+NUMERIC_FEATURES = [
+    "tech_generation", "year_inducted", "stealth_rating", "ew_capability",
+    "max_speed_kmph", "range_km", "max_altitude_m", "reliability",
+    "cost_million_usd", "threat_level", "payload_kg",
+]
+
+
+def build_features(systems: pd.DataFrame, type_encoder) -> np.ndarray:
+    """
+    Model 1 feature matrix for any number of systems, one row per system.
+    system_type is label-encoded for the whole column in one call.
+    """
+    cols = []
+    for name in NUMERIC_FEATURES:
+        if name in systems.columns:
+            cols.append(systems[name].to_numpy(dtype=np.float64))
+        else:
+            cols.append(np.zeros(len(systems)))
+    cols.append(type_encoder.transform(systems["system_type"].to_numpy()).astype(np.float64))
+    return np.column_stack(cols) if len(systems) else np.empty((0, len(cols)))
+
+
+class SystemPredictionCache:
+    """
+    Model 1 results for the whole catalogue, scored once.
+
+    Holds the scaled feature matrix as float32 (the dtype the forest scores
+    in anyway), the predicted class index and probabilities per row, and the
+    API-ready prediction per system_id. Rebuild whenever systems_df or the
+    model 1 artifacts change.
+    """
+
+    def __init__(self, systems: pd.DataFrame, type_encoder, scaler, model):
+        X = build_features(systems, type_encoder)
+        with span("scaler_transform"):
+            self.X = scaler.transform(X).astype(np.float32) if len(X) else X.astype(np.float32)
+        with span("model_predict"):
+            proba = model.predict_proba(self.X) if len(X) else np.empty((0, len(model.classes_)))
+        self.classes = model.classes_.tolist()
+        self.class_idx = np.argmax(proba, axis=1).astype(np.int8)
+        self.proba = proba.astype(np.float32)
+
+        self.by_position = [
+            {
+                "classification": self.classes[k],
+                "confidence": round(max(p), 3),
+                "probabilities": {c: round(v, 3) for c, v in zip(self.classes, p)},
+            }
+            for k, p in zip(self.class_idx.tolist(), proba.tolist())
+        ]
+        self.by_id = dict(zip(systems["system_id"].tolist(), self.by_position))
+
+    def __len__(self):
+        return len(self.by_position)
@@ -0,0 +1,204 @@
+"""
+DRDO Air Defence ML Project
+Typed columnar copy of data/ so startup skips CSV parsing.
+
+A store is a directory holding a manifest.json and, per frame, one file
+per column:
+
+  numeric / bool  <i>.npy            memory-mapped read-only on load
+  category        <i>.codes.npy      integer codes; categories in the manifest
+  text            <i>.txt + <i>.offsets.npy + <i>.null.npy
+                                     UTF-8 blob, character offsets, null mask
+
+Build it with
+
+    python -m src.columnar build [--data-dir data] [--out columnar]
+
+The manifest records the size and mtime of every source CSV; the API only
+uses the store while those still match (see read_store()) and parses the
+CSVs otherwise.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from .schema import CATEGORICAL_COLUMNS, DATA_FILES, REQUIRED_COLUMNS, read_csv_frames
+
+FORMAT_VERSION = 1
+MANIFEST = "manifest.json"
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_STORE_DIR = os.path.join(BASE_DIR, "columnar")
+
+
+class StoreError(ValueError):
+    """A store is missing, stale, or does not match the expected schema."""
+
+
+def source_stats(data_dir: str) -> dict:
+    """{frame: {file, size, mtime_ns}} for the CSVs in data_dir."""
+    stats = {}
+    for name, f in DATA_FILES.items():
+        st = os.stat(os.path.join(data_dir, f))
+        stats[name] = {"file": f, "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+    return stats
+
+
+def _write_frame(df: pd.DataFrame, out: str) -> list:
+    """Write df's columns into out; return the manifest column list."""
+    columns = []
+    for i, col in enumerate(df.columns):
+        series = df[col]
+        dtype = series.dtype
+        meta = {"name": str(col)}
+        if isinstance(dtype, pd.CategoricalDtype):
+            meta["kind"] = "category"
+            meta["categories"] = dtype.categories.tolist()
+            np.save(os.path.join(out, f"{i}.codes.npy"), series.cat.codes.to_numpy())
+        elif dtype.kind in "biuf":
+            meta["kind"] = "numeric"
+            meta["dtype"] = dtype.str
+            np.save(os.path.join(out, f"{i}.npy"), series.to_numpy())
+        elif dtype.kind == "O":
+            values = series.tolist()
+            null = series.isna().to_numpy()
+            bad = [v for v, m in zip(values, null) if not m and not isinstance(v, str)]
+            if bad:
+                raise StoreError(f"column {col!r} mixes text with {type(bad[0]).__name__} values")
+            texts = ["" if m else v for v, m in zip(values, null)]
+            offsets = np.zeros(len(texts) + 1, dtype=np.int64)
+            np.cumsum([len(t) for t in texts], out=offsets[1:])
+            meta["kind"] = "text"
+            with open(os.path.join(out, f"{i}.txt"), "w", encoding="utf-8", newline="") as fh:
+                fh.write("".join(texts))
+            np.save(os.path.join(out, f"{i}.offsets.npy"), offsets)
+            np.save(os.path.join(out, f"{i}.null.npy"), null)
+        else:
+            raise StoreError(f"column {col!r} has unsupported dtype {dtype}")
+        columns.append(meta)
+    return columns
+
+
+def _read_frame(path: str, meta: dict) -> pd.DataFrame:
+    data = {}
+    for i, col in enumerate(meta["columns"]):
+        kind = col["kind"]
+        if kind == "numeric":
+            data[col["name"]] = np.load(os.path.join(path, f"{i}.npy"), mmap_mode="r")
+        elif kind == "category":
+            codes = np.load(os.path.join(path, f"{i}.codes.npy"))
+            data[col["name"]] = pd.Categorical.from_codes(codes, categories=col["categories"])
+        else:
+            with open(os.path.join(path, f"{i}.txt"), encoding="utf-8", newline="") as fh:
+                blob = fh.read()
+            offsets = np.load(os.path.join(path, f"{i}.offsets.npy")).tolist()
+            null = np.load(os.path.join(path, f"{i}.null.npy")).tolist()
+            values = np.empty(meta["rows"], dtype=object)
+            # NaN for missing text, as read_csv leaves it
+            values[:] = [np.nan if m else blob[a:b] for a, b, m in zip(offsets, offsets[1:], null)]
+            data[col["name"]] = values
+    # copy=False keeps one block per column, i.e. the mapped arrays themselves
+    return pd.DataFrame(data, copy=False)
+
+
+def check_schema(manifest: dict):
+    """Raise StoreError unless the manifest has every frame, required column and categorical."""
+    if manifest.get("format") != FORMAT_VERSION:
+        raise StoreError(f"format {manifest.get('format')} != {FORMAT_VERSION}")
+    for name, required in REQUIRED_COLUMNS.items():
+        meta = manifest["frames"].get(name)
+        if meta is None:
+            raise StoreError(f"frame {name!r} missing")
+        kinds = {c["name"]: c["kind"] for c in meta["columns"]}
+        missing = [c for c in required if c not in kinds]
+        if missing:
+            raise StoreError(f"{name} is missing columns {missing}")
+        wrong = [c for c in CATEGORICAL_COLUMNS.get(name, ()) if kinds.get(c, "category") != "category"]
+        if wrong:
+            raise StoreError(f"{name} columns {wrong} are not categorical")
+
+
+def write_store(frames: dict, path: str, extra: dict = None) -> str:
+    """
+    Write frames to path (replacing any previous store there) and return
+    path. extra is saved in the manifest for read_store() to match against.
+    The store is built in a temp directory and renamed into place, so
+    readers never see half a store.
+    """
+    parent = os.path.dirname(os.path.abspath(path))
+    os.makedirs(parent, exist_ok=True)
+    tmp = tempfile.mkdtemp(prefix=f".{os.path.basename(path)}-", dir=parent)
+    try:
+        manifest = {"format": FORMAT_VERSION, **(extra or {}), "frames": {}}
+        for name, df in frames.items():
+            os.makedirs(os.path.join(tmp, name))
+            manifest["frames"][name] = {
+                "rows": len(df),
+                "columns": _write_frame(df, os.path.join(tmp, name)),
+            }
+        check_schema(manifest)
+        with open(os.path.join(tmp, MANIFEST), "w") as fh:
+            json.dump(manifest, fh)
+
+        if os.path.exists(path):
+            old = tempfile.mkdtemp(prefix=f".{os.path.basename(path)}-old-", dir=parent)
+            os.rename(path, os.path.join(old, "store"))
+            shutil.rmtree(old, ignore_errors=True)
+        os.rename(tmp, path)
+    except Exception:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+    return path
+
+
+def read_store(path: str, expect: dict = None) -> dict:
+    """
+    Frames from the store at path. Every key in expect must equal the
+    manifest's value (e.g. the source CSV stats). Raises StoreError when
+    the store is missing, stale or fails the schema check. Numeric columns
+    are read-only memory maps; copy before mutating.
+    """
+    try:
+        with open(os.path.join(path, MANIFEST)) as fh:
+            manifest = json.load(fh)
+    except (OSError, ValueError) as e:
+        raise StoreError(f"no readable manifest in {path}: {e}") from None
+    for key, value in (expect or {}).items():
+        if manifest.get(key) != value:
+            raise StoreError(f"{key} does not match the store ({path})")
+    check_schema(manifest)
+    return {name: _read_frame(os.path.join(path, name), meta) for name, meta in manifest["frames"].items()}
+
+
+def build(data_dir: str, out: str) -> str:
+    """Parse the CSVs in data_dir and write the columnar store to out."""
+    return write_store(read_csv_frames(data_dir), out, {"sources": source_stats(data_dir)})
+
+
+def load(data_dir: str, path: str) -> dict:
+    """Frames from the store at path if it was built from data_dir's current CSVs."""
+    return read_store(path, {"sources": source_stats(data_dir)})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the columnar copy of data/")
+    parser.add_argument("command", choices=["build"])
+    parser.add_argument("--data-dir", default=os.environ.get("AIRDEF_DATA_DIR", os.path.join(BASE_DIR, "data")))
+    parser.add_argument("--out", default=os.environ.get("AIRDEF_COLUMNAR_DIR", DEFAULT_STORE_DIR))
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    path = build(args.data_dir, args.out)
+    size = sum(os.path.getsize(os.path.join(d, f)) for d, _, files in os.walk(path) for f in files)
+    print(f"Columnar store: {path} ({size / 1e6:.1f} MB) in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+"""
+DRDO Air Defence ML Project
+Flat-array inference for the random forests and the standard scalers.
+
+sklearn's predict()/predict_proba() re-validate the input and dispatch
+through joblib on every call, which dominates the cost of scoring one
+26-feature row. FlatForest copies every tree of a fitted forest into a
+few contiguous NumPy arrays (feature, threshold, children, leaf value)
+and walks all trees for all rows at once with vectorised indexing.
+
+The float operations mirror sklearn's exactly (float32 inputs compared to
+float64 thresholds, trees summed in order, then divided by the tree count),
+and compile_forest() only returns a FlatForest after checking it
+reproduces the sklearn outputs bit for bit. save()/load() put those
+arrays in a directory that any number of processes can map read-only
+(src/serve.py shares them through the /dev/shm store).
+"""
+
+import json
+import os
+import threading
+
+import joblib
+import numpy as np
+
+TREE_BACKENDS = ("flat", "sklearn")
+
+# Node arrays FlatForest.save() writes (one .npy each) and load() maps
+FOREST_ARRAYS = ("roots", "feature", "threshold", "left", "right", "value")
+FOREST_META = "forest.json"
+
+# Above this many rows sklearn's compiled traversal beats the NumPy walk
+# (its fixed per-call overhead is amortised), so bigger batches go to the
+# wrapped model; both give identical outputs (see compile_forest()).
+# Measured crossover for the shipped forests is 384-512 rows; re-measure
+# with `python -m src.benchmark forest` after retraining.
+FLAT_MAX_ROWS = 384
+
+# Serialises unpickling the sklearn fallback of store-backed forests
+_fallback_lock = threading.Lock()
+
+
+class FlatForest:
+    """
+    A fitted RandomForest/ExtraTrees classifier or regressor (single
+    output) as flat node arrays. Exposes predict(), predict_proba(),
+    classes_ and n_features_in_ so it can stand in for the model; batches
+    over FLAT_MAX_ROWS are passed to the model itself.
+    """
+
+    def __init__(self, model):
+        self._model = model
+        self.path = None        # store directory when built by load()
+        self.model_path = None  # pickle the fallback model comes from, ditto
+        trees = [est.tree_ for est in model.estimators_]
+        self.is_classifier = hasattr(model, "classes_")
+        if self.is_classifier:
+            self.classes_ = model.classes_
+        self.n_features_in_ = model.n_features_in_
+        self.n_trees = len(trees)
+        self.max_depth = max(t.max_depth for t in trees)
+
+        sizes = [t.node_count for t in trees]
+        offsets = np.concatenate([[0], np.cumsum(sizes)[:-1]]).astype(np.intp)
+        self.roots = offsets
+        self.feature = np.concatenate([t.feature for t in trees]).astype(np.intp)
+        self.threshold = np.concatenate([t.threshold for t in trees])
+        left = np.concatenate([t.children_left + o for t, o in zip(trees, offsets)]).astype(np.intp)
+        right = np.concatenate([t.children_right + o for t, o in zip(trees, offsets)]).astype(np.intp)
+
+        # Leaves point at themselves, so every row can take max_depth steps
+        is_leaf = np.concatenate([t.children_left == -1 for t in trees])
+        own = np.arange(len(is_leaf), dtype=np.intp)
+        self.left = np.where(is_leaf, own, left)
+        self.right = np.where(is_leaf, own, right)
+        self.feature[is_leaf] = 0
+
+        if self.is_classifier:
+            # tree_.value already holds the leaf class fractions predict_proba returns
+            self.value = np.concatenate([t.value[:, 0, :len(self.classes_)] for t in trees])
+        else:
+            self.value = np.concatenate([t.value[:, 0, 0] for t in trees])
+
+    @property
+    def model(self):
+        """The wrapped sklearn model; a loaded forest unpickles it on first use."""
+        if self._model is None:
+            with _fallback_lock:
+                if self._model is None:
+                    self._model = joblib.load(self.model_path)
+        return self._model
+
+    def save(self, path: str) -> str:
+        """Write the node arrays and metadata to directory path (see load())."""
+        os.makedirs(path, exist_ok=True)
+        for name in FOREST_ARRAYS:
+            np.save(os.path.join(path, f"{name}.npy"), getattr(self, name))
+        meta = {
+            "n_features_in_": int(self.n_features_in_), "n_trees": self.n_trees,
+            "max_depth": int(self.max_depth), "is_classifier": self.is_classifier,
+        }
+        if self.is_classifier:
+            meta["classes"] = self.classes_.tolist()
+            meta["classes_dtype"] = self.classes_.dtype.str
+        with open(os.path.join(path, FOREST_META), "w") as fh:
+            json.dump(meta, fh)
+        return path
+
+    @classmethod
+    def load(cls, path: str, model_path: str) -> "FlatForest":
+        """
+        The forest save() wrote to path, its node arrays memory-mapped
+        read-only so every process loading path shares one copy. The sklearn
+        model (for batches over FLAT_MAX_ROWS) is unpickled from model_path
+        only when such a batch arrives. Raises OSError/ValueError/KeyError
+        on a missing or damaged directory.
+        """
+        with open(os.path.join(path, FOREST_META)) as fh:
+            meta = json.load(fh)
+        flat = cls.__new__(cls)
+        for name in FOREST_ARRAYS:
+            # Plain ndarray views of the maps: np.memmap's subclass hooks
+            # would double the cost of scoring one row
+            setattr(flat, name, np.asarray(np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")))
+        flat.n_features_in_ = meta["n_features_in_"]
+        flat.n_trees = meta["n_trees"]
+        flat.max_depth = meta["max_depth"]
+        flat.is_classifier = meta["is_classifier"]
+        if flat.is_classifier:
+            flat.classes_ = np.array(meta["classes"], dtype=meta["classes_dtype"])
+        flat._model, flat.path, flat.model_path = None, path, model_path
+        return flat
+
+    def __getstate__(self):
+        if self.path is not None:
+            # Loaded forests pickle as their location (e.g. for the Monte
+            # Carlo pool), so the receiving process maps the same files
+            return {"path": self.path, "model_path": self.model_path}
+        return self.__dict__
+
+    def __setstate__(self, state):
+        if "roots" not in state:
+            state = FlatForest.load(state["path"], state["model_path"]).__dict__
+        self.__dict__.update(state)
+
+    def _leaves(self, X: np.ndarray) -> np.ndarray:
+        """(n_rows, n_trees) leaf index reached by each row in each tree."""
+        X = np.asarray(X, dtype=np.float32)
+        rows = np.arange(len(X))[:, np.newaxis]
+        node = np.broadcast_to(self.roots, (len(X), self.n_trees)).copy()
+        for _ in range(self.max_depth):
+            go_left = X[rows, self.feature[node]] <= self.threshold[node]
+            node = np.where(go_left, self.left[node], self.right[node])
+        return node
+
+    def _mean_value(self, X: np.ndarray) -> np.ndarray:
+        """Leaf values averaged over the trees (at most FLAT_MAX_ROWS rows reach here)."""
+        per_tree = self.value[self._leaves(X)]
+        # cumsum adds the trees strictly in order, like sklearn's accumulation
+        return np.cumsum(per_tree, axis=1)[:, -1] / self.n_trees
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        if len(X) > FLAT_MAX_ROWS:
+            return self.model.predict_proba(X)
+        return self._mean_value(X)
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        if len(X) > FLAT_MAX_ROWS:
+            return self.model.predict(X)
+        if self.is_classifier:
+            return self.classes_.take(np.argmax(self._mean_value(X), axis=1))
+        return self._mean_value(X)
+
+
+class FlatScaler:
+    """StandardScaler.transform without input validation (same float ops)."""
+
+    def __init__(self, scaler):
+        self.mean_ = scaler.mean_ if scaler.with_mean else None
+        self.scale_ = scaler.scale_ if scaler.with_std else None
+        self.n_features_in_ = scaler.n_features_in_
+
+    def transform(self, X: np.ndarray) -> np.ndarray:
+        X = np.array(X, dtype=np.float64)
+        if self.mean_ is not None:
+            X -= self.mean_
+        if self.scale_ is not None:
+            X /= self.scale_
+        return X
+
+
+def _check_rows(n_features: int, n_rows: int = FLAT_MAX_ROWS) -> np.ndarray:
+    # Standardised-scale rows with a fixed seed: every split gets exercised both ways
+    return np.random.default_rng(0).normal(0, 1.5, size=(n_rows, n_features))
+
+
+def compile_forest(model, X_check: np.ndarray = None):
+    """
+    FlatForest for model, or None when the model is not a supported
+    forest or the flat outputs differ from sklearn's on X_check.
+    """
+    estimators = getattr(model, "estimators_", None)
+    if not estimators or not all(hasattr(e, "tree_") for e in estimators):
+        return None
+    if getattr(model, "n_outputs_", 1) != 1:
+        return None
+
+    flat = FlatForest(model)
+    if X_check is None:
+        X_check = _check_rows(flat.n_features_in_)
+    if flat.is_classifier:
+        same = np.array_equal(flat.predict_proba(X_check), model.predict_proba(X_check))
+    else:
+        same = np.array_equal(flat.predict(X_check), model.predict(X_check))
+    return flat if same else None
+
+
+def compile_scaler(scaler, X_check: np.ndarray = None):
+    """FlatScaler for a StandardScaler, or None if outputs differ on X_check."""
+    if not all(hasattr(scaler, a) for a in ("mean_", "scale_", "with_mean", "with_std")):
+        return None
+    flat = FlatScaler(scaler)
+    if X_check is None:
+        X_check = _check_rows(flat.n_features_in_) * 10 + 5
+    return flat if np.array_equal(flat.transform(X_check), scaler.transform(X_check)) else None
@@ -0,0 +1,126 @@
+"""
+DRDO Air Defence ML Project
+Derived lookup tables built once from the loaded DataFrames,
+so request handlers never have to rescan the raw data.
+"""
+
+import pandas as pd
+
+# system_type value -> force summary count key
+SYSTEM_TYPE_COUNT_KEYS = {
+    "Fighter_Aircraft":    "fighter_count",
+    "SAM_System":          "sam_count",
+    "UAV_Drone":           "uav_count",
+    "Helicopter":          "helicopter_count",
+    "Radar_System":        "radar_count",
+    "Interceptor_Missile": "missile_count",
+}
+
+AVERAGED_COLUMNS = [
+    "threat_level", "stealth_rating", "ew_capability", "tech_generation",
+    "reliability", "cost_million_usd",
+]
+
+# Safe defaults for a country that has no systems in the catalogue
+EMPTY_FORCE_SUMMARY = {
+    "total_systems": 0,
+    "modern_count": 0,
+    "traditional_count": 0,
+    "modern_pct": 0,
+    "avg_threat_level": 0,
+    "avg_stealth": 0,
+    "avg_ew": 0,
+    "avg_tech_gen": 0,
+    "avg_reliability": 0,
+    "avg_cost_musd": 0,
+    "fighter_count": 0,
+    "sam_count": 0,
+    "uav_count": 0,
+    "helicopter_count": 0,
+    "radar_count": 0,
+    "missile_count": 0,
+    "combat_proven_pct": 0,
+}
+
+
+def build_force_summaries(systems_df: pd.DataFrame) -> dict:
+    """
+    Force summary for every country in one grouped aggregation.
+    Returns {country: summary dict} with native Python values.
+    """
+    df = systems_df.assign(
+        _modern=systems_df["classification"] == "Modern",
+        _traditional=systems_df["classification"] == "Traditional",
+        # Averaged in float64 whatever the stored width (see schema.compact_numeric)
+        **{col: systems_df[col].astype("float64") for col in AVERAGED_COLUMNS},
+    )
+    agg = df.groupby("country", observed=True, sort=False).agg(
+        total_systems=("classification", "size"),
+        modern_count=("_modern", "sum"),
+        traditional_count=("_traditional", "sum"),
+        modern_frac=("_modern", "mean"),
+        avg_threat_level=("threat_level", "mean"),
+        avg_stealth=("stealth_rating", "mean"),
+        avg_ew=("ew_capability", "mean"),
+        avg_tech_gen=("tech_generation", "mean"),
+        avg_reliability=("reliability", "mean"),
+        avg_cost_musd=("cost_million_usd", "mean"),
+        combat_proven_frac=("combat_proven", "mean"),
+    )
+    type_counts = (
+        systems_df.groupby(["country", "system_type"], observed=True).size()
+        .unstack(fill_value=0)
+        .reindex(columns=list(SYSTEM_TYPE_COUNT_KEYS), fill_value=0)
+        .rename(columns=SYSTEM_TYPE_COUNT_KEYS)
+    )
+    agg = agg.join(type_counts)
+
+    summaries = {}
+    for country, r in agg.to_dict("index").items():
+        summaries[country] = {
+            "total_systems":    int(r["total_systems"]),
+            "modern_count":     int(r["modern_count"]),
+            "traditional_count":int(r["traditional_count"]),
+            "modern_pct":       round(float(r["modern_frac"] * 100), 1),
+            "avg_threat_level": round(float(r["avg_threat_level"]), 2),
+            "avg_stealth":      round(float(r["avg_stealth"]), 2),
+            "avg_ew":           round(float(r["avg_ew"]), 2),
+            "avg_tech_gen":     round(float(r["avg_tech_gen"]), 2),
+            "avg_reliability":  round(float(r["avg_reliability"]), 1),
+            "avg_cost_musd":    round(float(r["avg_cost_musd"]), 1),
+            **{key: int(r[key]) for key in SYSTEM_TYPE_COUNT_KEYS.values()},
+            "combat_proven_pct":round(float(r["combat_proven_frac"] * 100), 1),
+        }
+    return summaries
+
+
+def build_type_partitions(systems_df: pd.DataFrame) -> dict:
+    """
+    {country: {system_type: row positions}}, types in category order and
+    positions in file order, i.e. what grouping one country's rows by
+    system_type would give.
+    """
+    groups = systems_df.groupby(["country", "system_type"], observed=True, sort=True).indices
+    partitions = {}
+    for (country, system_type), positions in groups.items():
+        partitions.setdefault(country, {})[system_type] = positions
+    return partitions
+
+
+def value_counts_dict(series: pd.Series) -> dict:
+    """value_counts() as a dict; categoricals count like plain strings (no zero rows)."""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        series = series.astype(object)
+    return series.value_counts().to_dict()
+
+
+def build_name_index(names: pd.Series) -> dict:
+    """
+    Case-insensitive exact-match index: lowercase name -> row position.
+    Duplicates keep their first position, like .iloc[0] on a filtered frame.
+    """
+    index = {}
+    for pos, name in enumerate(names.tolist()):
+        if isinstance(name, str):
+            index.setdefault(name.lower(), pos)
+    return index
@@ -0,0 +1,123 @@
+"""
+DRDO Air Defence ML Project
+Dedicated executor for model calls.
+
+Model work runs on its own bounded thread pool instead of Starlette's
+shared one, so a burst of predictions cannot starve the catalogue routes.
+Each model key has its own concurrency limit, and concurrent single-row
+requests can be micro-batched into one call.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+
+
+class _MicroBatcher:
+    """
+    Collects items submitted within window seconds (or until max_batch)
+    and runs batch_fn(items) -> results once for all of them.
+    """
+
+    def __init__(self, executor: "InferenceExecutor", model: str, batch_fn):
+        self.executor = executor
+        self.model = model
+        self.batch_fn = batch_fn
+        self._pending = []
+        self._timer = None
+        self._tasks = set()  # running batches; the loop only keeps weak references
+
+    async def submit(self, item):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+        if len(self._pending) >= self.executor.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.executor.window, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch):
+        stats = self.executor.stats_for(self.model)
+        stats["batches"] += 1
+        stats["batched_items"] += len(batch)
+        try:
+            results = await self.executor.run(self.model, self.batch_fn, [item for item, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+
+class InferenceExecutor:
+    """
+    Bounded thread pool for model calls.
+
+    run(model, fn, *args)        -- fn(*args) on the pool, at most
+                                    per_model_limit at once per model key
+    submit(model, batch_fn, item) -- queue item; items arriving within
+                                    window_ms share one batch_fn(items) call
+    sklearn's tree predictors release the GIL, so threads scale across cores.
+    """
+
+    def __init__(self, max_workers: int = 4, per_model_limit: int = 2,
+                 window_ms: float = 2.0, max_batch: int = 256):
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="inference")
+        self.max_workers = max_workers
+        self.per_model_limit = per_model_limit
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self._semaphores = {}
+        self._batchers = {}
+        self._stats = {}
+
+    def stats_for(self, model: str) -> dict:
+        stats = self._stats.get(model)
+        if stats is None:
+            stats = self._stats[model] = {
+                "in_flight": 0, "waiting": 0, "calls": 0, "batches": 0, "batched_items": 0,
+            }
+        return stats
+
+    async def run(self, model: str, fn, *args):
+        sem = self._semaphores.get(model)
+        if sem is None:
+            sem = self._semaphores[model] = asyncio.Semaphore(self.per_model_limit)
+        stats = self.stats_for(model)
+        stats["waiting"] += 1
+        async with sem:
+            stats["waiting"] -= 1
+            stats["in_flight"] += 1
+            try:
+                return await asyncio.get_running_loop().run_in_executor(self.pool, fn, *args)
+            finally:
+                stats["in_flight"] -= 1
+                stats["calls"] += 1
+
+    async def submit(self, model: str, batch_fn, item):
+        batcher = self._batchers.get(model)
+        if batcher is None:
+            batcher = self._batchers[model] = _MicroBatcher(self, model, batch_fn)
+        return await batcher.submit(item)
+
+    def status(self) -> dict:
+        return {
+            "max_workers": self.max_workers,
+            "per_model_limit": self.per_model_limit,
+            "batch_window_ms": self.window * 1000,
+            "max_batch": self.max_batch,
+            "models": {name: dict(stats) for name, stats in self._stats.items()},
+        }
@@ -4,30 +4,28 @@ Step 3: FastAPI Backend
 All endpoints for frontend team (React)
 """
 
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from starlette.routing import Match
+from anyio import from_thread
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Literal, Optional
 import pandas as pd
 import numpy as np
-import joblib, json, os
-def to_native(obj):
-    """
-    Recursively convert numpy types to native Python types
-    so FastAPI can serialize safely.
-    """
-    if isinstance(obj, dict):
-        return {k: to_native(v) for k, v in obj.items()}
-    elif isinstance(obj, list):
-        return [to_native(v) for v in obj]
-    elif isinstance(obj, (np.integer,)):
-        return int(obj)
-    elif isinstance(obj, (np.floating,)):
-        return float(obj)
-    elif isinstance(obj, (np.bool_,)):
-        return bool(obj)
-    else:
-        return obj
+import base64, gc, hmac, math, os, re, threading, time
+
+from .cache import ResponseCache, body_etag, etag_matches
+from .columnar import DEFAULT_STORE_DIR
+from .forest import TREE_BACKENDS
+from .inference import InferenceExecutor
+from .metrics import metrics, span
+from .montecarlo import DEFAULT_PERCENTILES, SamplePool, sample_chunks, score_chunks, summarise
+from .indexes import EMPTY_FORCE_SUMMARY, SYSTEM_TYPE_COUNT_KEYS, value_counts_dict
+from .registry import ModelUnavailableError, Registry
+from .schema import category_mask
+from .serialize import FastJSONResponse, df_to_records, iter_ndjson
+from .war import OUTCOME_DESCRIPTIONS, SIDE_INDEX, SIMULATED_DELTAS, score_pairs, score_sides, simulate_side
 
 # â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
 # INIT
@@ -38,6 +36,45 @@ app = FastAPI(
     version="1.0.0"
 )
 
+# Read-only catalogue endpoints, served from pre-serialized bytes
+CACHEABLE_ROUTES = re.compile(
+    r"^/api/(countries|systems|map/zones|stats/overview|models/info|country/[^/]+/insights)$"
+)
+CACHE_CONTROL = "public, max-age=60"
+NDJSON = "application/x-ndjson"
+response_cache = ResponseCache()
+
+# Registered before CORS so cached responses still get CORS headers
+@app.middleware("http")
+async def cache_read_only_responses(request: Request, call_next):
+    """
+    Cache successful GETs on CACHEABLE_ROUTES per route + query params.
+    Each cached body carries an ETag of the data version plus a hash of
+    the body; If-None-Match with that tag gets a 304. Only a 200 body has
+    a tag, so errors (404/422) are never answered with a 304.
+    """
+    if request.method != "GET" or not CACHEABLE_ROUTES.match(request.url.path):
+        return await call_next(request)
+    if NDJSON in request.headers.get("accept", ""):
+        return await call_next(request)  # streamed, never buffered or cached
+
+    version = registry.current().version
+    key = (version,) + ResponseCache.make_key(request.url.path, request.query_params.multi_items())
+    entry = response_cache.get(key)
+    if entry is None:
+        response = await call_next(request)
+        if response.status_code != 200:
+            return response
+        body = b"".join([chunk async for chunk in response.body_iterator])
+        entry = (body, body_etag(version, body))
+        response_cache.put(key, *entry)
+
+    body, etag = entry
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL, "Vary": "Accept"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
 # Allow React frontend on any port
 app.add_middleware(
     CORSMiddleware,
@@ -46,35 +83,130 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Registered last, so it is outermost: timings include cache hits and CORS
+@app.middleware("http")
+async def record_metrics(request: Request, call_next):
+    """Per-route request count, latency and response size for GET /metrics."""
+    started = time.perf_counter()
+    metrics.add_in_flight(1)
+    try:
+        response = await call_next(request)
+    except Exception:
+        metrics.add_in_flight(-1)
+        metrics.observe_request(request.method, route_label(request.scope), 500, time.perf_counter() - started)
+        raise
+
+    route = route_label(request.scope)
+    length = response.headers.get("content-length")
+    if length is not None:
+        metrics.add_in_flight(-1)
+        metrics.observe_request(request.method, route, response.status_code, time.perf_counter() - started, int(length))
+        return response
+
+    # Streamed (NDJSON): recorded once the last chunk has gone out
+    body = response.body_iterator
+
+    async def counted():
+        size = 0
+        try:
+            async for chunk in body:
+                size += len(chunk)
+                yield chunk
+        finally:
+            metrics.add_in_flight(-1)
+            metrics.observe_request(request.method, route, response.status_code, time.perf_counter() - started, size)
+
+    response.body_iterator = counted()
+    return response
+
+ROUTE_TEMPLATES = {}  # endpoint -> path template, filled on first use
+
+def route_label(scope) -> str:
+    """The matched route's path template, so labels stay low-cardinality."""
+    endpoint = scope.get("endpoint")
+    if endpoint is not None:
+        if not ROUTE_TEMPLATES:
+            ROUTE_TEMPLATES.update({r.endpoint: r.path for r in app.routes if hasattr(r, "endpoint")})
+        if endpoint in ROUTE_TEMPLATES:
+            return ROUTE_TEMPLATES[endpoint]
+    # Answered before routing (cache hit, 304) or not routed at all
+    for r in app.routes:
+        if r.matches(scope)[0] == Match.FULL:
+            return r.path
+    return "unmatched"
+
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-DATA_DIR = os.path.join(BASE_DIR, "data")
-MODEL_DIR = os.path.join(BASE_DIR, "models")
+DATA_DIR = os.environ.get("AIRDEF_DATA_DIR", os.path.join(BASE_DIR, "data"))
+MODEL_DIR = os.environ.get("AIRDEF_MODEL_DIR", os.path.join(BASE_DIR, "models"))
+
+# /api/admin/* needs X-Admin-Token matching AIRDEF_ADMIN_TOKEN; without a
+# token they answer 403 unless AIRDEF_ADMIN_OPEN=1 (trusted local use only)
+ADMIN_TOKEN = os.environ.get("AIRDEF_ADMIN_TOKEN")
+ADMIN_OPEN = os.environ.get("AIRDEF_ADMIN_OPEN", "0") == "1"
+# Optional: poll data/ and models/ every N seconds and hot-reload on change
+WATCH_INTERVAL = float(os.environ.get("AIRDEF_WATCH_INTERVAL", "0"))
+# Models are unpickled on first use; AIRDEF_WARMUP=0 skips loading them in
+# the background at startup. AIRDEF_MODEL_MMAP=1 passes mmap_mode="r" to
+# joblib (sklearn still copies the tree nodes; src/serve.py shares the flat
+# forests through its store instead).
+WARMUP = os.environ.get("AIRDEF_WARMUP", "1") != "0"
+MODEL_MMAP = "r" if os.environ.get("AIRDEF_MODEL_MMAP", "0") == "1" else None
+# Model calls run on their own bounded pool (src/inference.py)
+INFERENCE_THREADS = int(os.environ.get("AIRDEF_INFERENCE_THREADS", min(4, os.cpu_count() or 1)))
+MODEL_CONCURRENCY = int(os.environ.get("AIRDEF_MODEL_CONCURRENCY", "2"))
+BATCH_WINDOW_MS = float(os.environ.get("AIRDEF_BATCH_WINDOW_MS", "2"))
+# predict_war?samples=N: N >= MC_POOL_MIN_SAMPLES is spread over this many
+# processes (src/montecarlo.py); 0 keeps every sample in-process
+MC_PROCESSES = int(os.environ.get("AIRDEF_MC_PROCESSES", min(4, os.cpu_count() or 1) if (os.cpu_count() or 1) > 1 else 0))
+MC_POOL_MIN_SAMPLES = int(os.environ.get("AIRDEF_MC_POOL_MIN_SAMPLES", "50000"))
+# "flat": score the forests from flat NumPy arrays (src/forest.py), used
+# only when it matches sklearn exactly; "sklearn": always call the models
+TREE_BACKEND = os.environ.get("AIRDEF_TREE_BACKEND", "flat")
+if TREE_BACKEND not in TREE_BACKENDS:
+    raise ValueError(f"AIRDEF_TREE_BACKEND must be one of {TREE_BACKENDS}")
+# Set by src/serve.py: parsed frames shared read-only across workers
+SHARED_STORE = os.environ.get("AIRDEF_SHARED_STORE")
+# Typed columnar copy of data/ (python -m src.columnar build); used while
+# it matches the CSVs, which are parsed otherwise. Empty disables it.
+COLUMNAR_DIR = os.environ.get("AIRDEF_COLUMNAR_DIR", DEFAULT_STORE_DIR) or None
+# Freeze the live snapshot out of the cyclic GC after warmup and each swap
+# (see freeze_snapshot()); AIRDEF_GC_FREEZE=0 leaves the GC alone
+GC_FREEZE = os.environ.get("AIRDEF_GC_FREEZE", "1") != "0"
 
 # â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
 # LOAD DATA & MODELS AT STARTUP
 # â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
-countries_df = pd.read_csv(os.path.join(DATA_DIR, "countries_profiles.csv"))
-systems_df = pd.read_csv(os.path.join(DATA_DIR, "air_systems_enhanced.csv"))
-scenarios_df = pd.read_csv(os.path.join(DATA_DIR, "conflict_scenarios.csv"))
-
-# ==========================================================
-# LOAD MODELS
-# ==========================================================
-
-model1 = joblib.load(os.path.join(MODEL_DIR, "model1_classifier.pkl"))
-model2 = joblib.load(os.path.join(MODEL_DIR, "model2_war_outcome.pkl"))
-model3 = joblib.load(os.path.join(MODEL_DIR, "model3_win_prob.pkl"))
+# Frames, models and derived indexes live on one snapshot (src/registry.py).
+# Routes call registry.current() once and use only that snapshot, so a
+# reload swaps everything atomically while in-flight requests finish.
+def freeze_snapshot():
+    """
+    Move everything alive now (the snapshot's frames, indexes and caches)
+    to the GC's permanent generation. Large requests allocate enough
+    containers to trigger full collections, which would otherwise walk the
+    whole snapshot holding the GIL (~100 ms) and stall the event loop from
+    whichever thread runs them. The previous freeze is undone first, so
+    cycles in a replaced snapshot are still collected.
+    """
+    if GC_FREEZE:
+        gc.unfreeze()
+        gc.collect()
+        gc.freeze()
+
+registry = Registry(
+    DATA_DIR, MODEL_DIR, mmap_mode=MODEL_MMAP, store_dir=SHARED_STORE,
+    tree_backend=TREE_BACKEND, columnar_dir=COLUMNAR_DIR,
+)
+registry.on_swap(lambda snapshot: response_cache.clear())
+registry.on_swap(lambda snapshot: freeze_snapshot())  # reloads arrive warmed
+registry.load()
 
-scaler_m1 = joblib.load(os.path.join(MODEL_DIR, "scaler_m1.pkl"))
-scaler_m2 = joblib.load(os.path.join(MODEL_DIR, "scaler_m2.pkl"))
-sys_type_enc = joblib.load(os.path.join(MODEL_DIR, "system_type_encoder.pkl"))
-with open(os.path.join(MODEL_DIR, "model_metadata.json")) as fh:
-    model_meta = json.load(fh)
+inference = InferenceExecutor(INFERENCE_THREADS, MODEL_CONCURRENCY, BATCH_WINDOW_MS)
+sample_pool = SamplePool(MC_PROCESSES)
 
-MODEL1_ALGO = model_meta.get("model1", {}).get("algorithm", "Classifier")
-MODEL2_ALGO = model_meta.get("model2", {}).get("algorithm", "Classifier")
-MODEL1_ACC = model_meta.get("model1", {}).get("accuracy", model_meta.get("model1_accuracy"))
-MODEL2_ACC = model_meta.get("model2", {}).get("accuracy", model_meta.get("model2_accuracy"))
+@app.exception_handler(ModelUnavailableError)
+def model_unavailable(request: Request, exc: ModelUnavailableError):
+    return JSONResponse(status_code=503, content={"detail": str(exc)})
 
 # Country coordinates for the world map
 COUNTRY_COORDS = {
@@ -97,62 +229,46 @@ COUNTRY_COORDS = {
 # Zone colour mapping (relative to India)
 ZONE_COLORS = {"Red": "#ef4444", "Yellow": "#eab308", "Green": "#22c55e"}
 
-def df_to_records(df: pd.DataFrame) -> list:
-    """Convert a DataFrame to a JSON-safe list of dicts."""
-    return json.loads(df.to_json(orient="records"))
-
-def get_country_row(name: str):
-    row = countries_df[countries_df["country"].str.lower() == name.lower()]
-    if row.empty:
+def get_country_pos(s, name: str) -> int:
+    pos = s.country_name_index.get(name.lower())
+    if pos is None:
         raise HTTPException(404, f"Country '{name}' not found")
-    return row.iloc[0]
-def get_country_systems(country_name: str) -> pd.DataFrame:
-    return systems_df[systems_df["country"] == country_name].copy()
-
-def country_force_summary(country_name: str) -> dict:
-    cs = get_country_systems(country_name)
-
-    if cs.empty:
-        # Return safe defaults instead of empty dict
-        return {
-            "total_systems": 0,
-            "modern_count": 0,
-            "traditional_count": 0,
-            "modern_pct": 0,
-            "avg_threat_level": 0,
-            "avg_stealth": 0,
-            "avg_ew": 0,
-            "avg_tech_gen": 0,
-            "avg_reliability": 0,
-            "avg_cost_musd": 0,
-            "fighter_count": 0,
-            "sam_count": 0,
-            "uav_count": 0,
-            "helicopter_count": 0,
-            "radar_count": 0,
-            "missile_count": 0,
-            "combat_proven_pct": 0,
-        }
+    return pos
 
-    return {
-        "total_systems":    int(len(cs)),
-        "modern_count":     int((cs["classification"] == "Modern").sum()),
-        "traditional_count":int((cs["classification"] == "Traditional").sum()),
-        "modern_pct":       round(float((cs["classification"] == "Modern").mean() * 100), 1),
-        "avg_threat_level": round(float(cs["threat_level"].mean()), 2),
-        "avg_stealth":      round(float(cs["stealth_rating"].mean()), 2),
-        "avg_ew":           round(float(cs["ew_capability"].mean()), 2),
-        "avg_tech_gen":     round(float(cs["tech_generation"].mean()), 2),
-        "avg_reliability":  round(float(cs["reliability"].mean()), 1),
-        "avg_cost_musd":    round(float(cs["cost_million_usd"].mean()), 1),
-        "fighter_count":    int((cs["system_type"] == "Fighter_Aircraft").sum()),
-        "sam_count":        int((cs["system_type"] == "SAM_System").sum()),
-        "uav_count":        int((cs["system_type"] == "UAV_Drone").sum()),
-        "helicopter_count": int((cs["system_type"] == "Helicopter").sum()),
-        "radar_count":      int((cs["system_type"] == "Radar_System").sum()),
-        "missile_count":    int((cs["system_type"] == "Interceptor_Missile").sum()),
-        "combat_proven_pct":round(float(cs["combat_proven"].mean() * 100), 1),
-    }
+def get_country_row(s, name: str):
+    return s.countries_df.iloc[get_country_pos(s, name)]
+
+def get_system_pos(s, name: str) -> int:
+    """
+    Resolve one system by display name to its row position: exact
+    (case-insensitive) first, then a unique partial match.
+    """
+    pos = s.system_name_index.get(name.lower())
+    if pos is not None:
+        return pos
+
+    systems_df = s.systems_df
+    partial = np.flatnonzero(systems_df["system_name"].str.contains(name, case=False, na=False))
+    if len(partial) == 0:
+        raise HTTPException(404, f"System '{name}' not found")
+    if len(partial) > 1:
+        matches = sorted(systems_df["system_name"].iloc[partial].tolist())
+        raise HTTPException(
+            409,
+            f"Multiple systems match '{name}'. Please use exact name: {matches}"
+        )
+    return int(partial[0])
+
+def get_system_row(s, name: str):
+    return s.systems_df.iloc[get_system_pos(s, name)]
+def get_country_systems(s, country_name: str) -> pd.DataFrame:
+    with span("filter"):
+        return s.systems_df[s.systems_df["country"] == country_name].copy()
+
+def country_force_summary(s, country_name: str) -> dict:
+    # Precomputed per snapshot; safe defaults when the country has no systems
+    with span("force_summary"):
+        return dict(s.force_summaries.get(country_name, EMPTY_FORCE_SUMMARY))
 
 
 # â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
@@ -161,6 +277,33 @@ def country_force_summary(country_name: str) -> dict:
 class SystemClassifyInput(BaseModel):
     system_name: str
 
+class SystemClassifyBatchInput(BaseModel):
+    system_names: List[str] = []
+    country: Optional[str] = None
+    system_type: Optional[str] = None
+
+class WarPairInput(BaseModel):
+    attacker_country: str
+    defender_country: str
+
+class WarBatchInput(BaseModel):
+    pairs: List[WarPairInput] = []
+    all_pairs: bool = False
+
+class SimulationAxis(BaseModel):
+    side: Literal["attacker", "defender"]
+    change: Literal["fighter_count", "sam_count", "uav_count", "military_budget", "aircraft_count", "system"]
+    system_name: Optional[str] = None   # catalogue system, for change="system"
+    values: Optional[List[float]] = None
+    start: Optional[float] = None       # or an inclusive range start..stop by step
+    stop: Optional[float] = None
+    step: float = 1
+
+class WarSimulationInput(BaseModel):
+    attacker_country: str
+    defender_country: str
+    axes: List[SimulationAxis]
+
 # â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•
 #   ROUTES
 # â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•
@@ -168,10 +311,14 @@ class SystemClassifyInput(BaseModel):
 # â”€â”€ Health â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
 @app.get("/", tags=["Health"])
 def root():
+    # Never touches a model, so it answers before the warmup has finished
+    models = {name: m.state for name, m in registry.current().lazy_models.items()}
     return {
         "status": "online",
         "project": "DRDO Air Defence ML API",
         "version": "1.0.0",
+        "ready": all(state == "ready" for state in models.values()),
+        "models": models,
         "endpoints": [
             "GET  /api/countries",
             "GET  /api/countries/names",
@@ -179,13 +326,21 @@ def root():
             "GET  /api/systems",
             "GET  /api/systems/names",
             "GET  /api/systems/by-name/{system_name}",
+            "GET  /api/systems/{system_id}/similar",
             "GET  /api/compare",
+            "GET  /api/compare/multi",
             "GET  /api/map/zones",
             "GET  /api/country/{name}/insights",
             "POST /api/predict/classify-system",
+            "POST /api/predict/classify-system/batch",
             "GET  /api/predict/war",
+            "POST /api/predict/war/batch",
+            "POST /api/simulate/war",
             "GET  /api/stats/overview",
             "GET  /api/models/info",
+            "POST /api/admin/reload",
+            "GET  /api/admin/status",
+            "GET  /metrics",
         ]
     }
 
@@ -196,9 +351,10 @@ def list_countries(risk_zone: Optional[str] = Query(None, description="Filter: R
     Returns all countries with basic profile.
     Optionally filter by risk_zone (Red, Yellow, Green).
     """
-    df = countries_df.copy()
+    s = registry.current()
+    df = s.countries_df.copy()
     if risk_zone:
-        df = df[df["risk_zone"].str.lower() == risk_zone.lower()]
+        df = df[category_mask(df["risk_zone"], risk_zone)]
         if df.empty:
             raise HTTPException(404, f"No countries found for risk_zone='{risk_zone}'")
 
@@ -222,7 +378,7 @@ def list_countries(risk_zone: Optional[str] = Query(None, description="Filter: R
             "nuclear_capable": bool(row["nuclear_capable"]),
             "relation_with_india": row["relation_with_india"],
         })
-    return {"count": len(result), "countries": result}
+    return FastJSONResponse({"count": len(result), "countries": result})
 
 
 @app.get("/api/countries/names", tags=["Countries"])
@@ -232,28 +388,23 @@ def list_country_names(
 ):
     """
     Lightweight list for country dropdown/autocomplete.
+    Prefix matches rank first, then other substring matches, alphabetically.
     """
-    df = countries_df.copy()
-    if q:
-        df = df[df["country"].str.contains(q, case=False, na=False)]
-    df = df.sort_values("country").head(limit)
-    cols = ["country", "iso_code", "risk_zone", "flag_url"]
-    return {"count": int(len(df)), "countries": df_to_records(df[cols])}
+    s = registry.current()
+    matches = s.country_search.search(q, limit)
+    return FastJSONResponse({"count": len(matches), "countries": matches})
 
 
 @app.get("/api/countries/{country_name}", tags=["Countries"])
 def get_country(country_name: str):
     """Full profile for a single country including systems list."""
-    row = countries_df[countries_df["country"].str.lower() == country_name.lower()]
-    if row.empty:
-        raise HTTPException(404, f"Country '{country_name}' not found")
-
-    row = row.iloc[0]
+    s = registry.current()
+    row = get_country_row(s, country_name)
     coords = COUNTRY_COORDS.get(row["country"], {"lat": 0, "lng": 0})
-    systems = get_country_systems(row["country"])
-    force = country_force_summary(row["country"])
+    systems = get_country_systems(s, row["country"])
+    force = country_force_summary(s, row["country"])
 
-    return {
+    return FastJSONResponse({
         **row.to_dict(),
         "lat": coords["lat"],
         "lng": coords["lng"],
@@ -264,41 +415,152 @@ def get_country(country_name: str):
             "year_inducted", "threat_level", "image_url", "wikipedia_url",
             "operational_status", "combat_proven"
         ]]),
-    }
+    })
 
 
 # â”€â”€ Systems â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
+MAX_PAGE_SIZE = 1000
+NDJSON_BATCH = 256
+PREDICTION_FIELDS = ["predicted_classification", "prediction_confidence"]
+
+def encode_cursor(s, pos: int) -> str:
+    return base64.urlsafe_b64encode(f"{s.version}:{pos}".encode()).decode()
+
+def decode_cursor(s, cursor: str) -> int:
+    """Row position of the last record on the previous page."""
+    try:
+        version, pos = base64.urlsafe_b64decode(cursor.encode()).decode().split(":")
+        pos = int(pos)
+    except ValueError:
+        raise HTTPException(400, "Invalid cursor")
+    if version != s.version:
+        raise HTTPException(410, "Cursor is from an older data version; start again from the first page")
+    return pos
+
+def system_records(s, positions, columns: list, predictions: list) -> list:
+    """
+    Records for s.systems_df row positions, projected to columns (+ prediction
+    fields; await system_predictions(s) first so they are not scored here).
+    """
+    if columns:
+        records = df_to_records(s.systems_df.iloc[positions][columns])
+    else:
+        records = [{} for _ in positions]  # prediction fields only
+    if predictions:
+        cached = s.system_predictions.by_position
+        for rec, p in zip(records, positions):
+            pred = cached[p]
+            if "predicted_classification" in predictions:
+                rec["predicted_classification"] = pred["classification"]
+            if "prediction_confidence" in predictions:
+                rec["prediction_confidence"] = pred["confidence"]
+    return records
+
+
 @app.get("/api/systems", tags=["Systems"])
 def list_systems(
+    request: Request,
     country: Optional[str] = None,
     system_name: Optional[str] = Query(None, description="Search by system name (full or partial)"),
     system_type: Optional[str] = None,
     classification: Optional[str] = None,
     min_threat: Optional[float] = None,
     max_threat: Optional[float] = None,
+    min_range: Optional[float] = Query(None, description="Minimum range_km"),
+    max_range: Optional[float] = Query(None, description="Maximum range_km"),
+    min_speed: Optional[float] = Query(None, description="Minimum max_speed_kmph"),
+    max_speed: Optional[float] = Query(None, description="Maximum max_speed_kmph"),
+    min_year: Optional[int] = Query(None, description="Inducted in or after this year"),
+    max_year: Optional[int] = Query(None, description="Inducted in or before this year"),
+    include_prediction: bool = Query(False, description="Add Model 1 predicted classification per system"),
+    fields: Optional[str] = Query(None, description="Comma-separated columns to return, e.g. system_id,system_name,threat_level"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Page size (default: everything)"),
+    offset: int = Query(0, ge=0, description="Skip this many matches"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
 ):
     """
     All air defence systems with rich details.
-    Supports filters: country, system_name, system_type, classification, threat range.
-    """
-    df = systems_df.copy()
-    if country:
-        df = df[df["country"].str.lower() == country.lower()]
-    if system_name:
-        df = df[df["system_name"].str.contains(system_name, case=False, na=False)]
-    if system_type:
-        df = df[df["system_type"].str.lower() == system_type.lower()]
-    if classification:
-        df = df[df["classification"].str.lower() == classification.lower()]
-    if min_threat is not None:
-        df = df[df["threat_level"] >= min_threat]
-    if max_threat is not None:
-        df = df[df["threat_level"] <= max_threat]
-
-    if df.empty:
+    Supports filters: country, system_name, system_type, classification,
+    and inclusive ranges on threat level, range, speed and induction year.
+    Page with limit + offset or limit + cursor; trim columns with fields.
+    Send Accept: application/x-ndjson to stream one record per line
+    (total in X-Total-Count, next page in X-Next-Cursor).
+    """
+    s = registry.current()
+    systems_df = s.systems_df
+
+    # Filter to row positions via the snapshot's query index; only the
+    # returned page is materialised
+    with span("filter"):
+        positions = s.system_query.select(
+            equals={"country": country, "system_type": system_type, "classification": classification},
+            ranges={
+                "threat_level":   (min_threat, max_threat),
+                "range_km":       (min_range, max_range),
+                "max_speed_kmph": (min_speed, max_speed),
+                "year_inducted":  (min_year, max_year),
+            },
+        )
+        if system_name and len(positions):
+            names = systems_df["system_name"].iloc[positions]
+            positions = positions[names.str.contains(system_name, case=False, na=False).to_numpy()]
+    total = len(positions)
+
+    if total == 0:
         raise HTTPException(404, "No systems match the given filters")
 
-    return {"count": len(df), "systems": df_to_records(df)}
+    # Projection
+    if fields is not None:
+        requested = list(dict.fromkeys(f.strip() for f in fields.split(",") if f.strip()))
+        valid = list(systems_df.columns) + PREDICTION_FIELDS
+        if not requested:
+            raise HTTPException(400, f"fields must name at least one field. Valid fields: {valid}")
+        unknown = [f for f in requested if f not in valid]
+        if unknown:
+            raise HTTPException(400, f"Unknown fields {unknown}. Valid fields: {valid}")
+        columns = [f for f in requested if f not in PREDICTION_FIELDS]
+        predictions = [f for f in requested if f in PREDICTION_FIELDS]
+    else:
+        columns = list(systems_df.columns)
+        predictions = PREDICTION_FIELDS if include_prediction else []
+    if predictions and not s.system_predictions_ready:
+        # A sync route runs on a worker thread: score on the inference pool
+        # via the event loop, under the same model1 limit as the async routes
+        from_thread.run(system_predictions, s)
+
+    # Pagination
+    paginated = limit is not None or cursor is not None or offset > 0
+    if cursor is not None:
+        if offset:
+            raise HTTPException(400, "Use either offset or cursor, not both")
+        start = int(np.searchsorted(positions, decode_cursor(s, cursor), side="right"))
+    else:
+        start = offset
+    page = positions[start:start + limit] if limit is not None else positions[start:]
+    has_more = start + len(page) < total
+    next_cursor = encode_cursor(s, int(page[-1])) if has_more and len(page) else None
+
+    if NDJSON in request.headers.get("accept", ""):
+        batches = (
+            system_records(s, page[i:i + NDJSON_BATCH], columns, predictions)
+            for i in range(0, len(page), NDJSON_BATCH)
+        )
+        headers = {"X-Total-Count": str(total)}
+        if next_cursor:
+            headers["X-Next-Cursor"] = next_cursor
+        return StreamingResponse(iter_ndjson(batches), media_type=NDJSON, headers=headers)
+
+    records = system_records(s, page, columns, predictions)
+    if not paginated:
+        return FastJSONResponse({"count": total, "systems": records})
+    return FastJSONResponse({
+        "count": total,
+        "offset": start,
+        "limit": limit,
+        "returned": len(records),
+        "next_cursor": next_cursor,
+        "systems": records,
+    })
 
 
 @app.get("/api/systems/names", tags=["Systems"])
@@ -309,18 +571,11 @@ def list_system_names(
 ):
     """
     Lightweight list for dropdown/autocomplete by system name.
+    Prefix matches rank first, then other substring matches, alphabetically.
     """
-    df = systems_df.copy()
-
-    if country:
-        df = df[df["country"].str.lower() == country.lower()]
-    if q:
-        df = df[df["system_name"].str.contains(q, case=False, na=False)]
-
-    df = df.sort_values("system_name").head(limit)
-    cols = ["system_id", "system_name", "country", "system_type", "classification", "threat_level"]
-
-    return {"count": int(len(df)), "systems": df_to_records(df[cols])}
+    s = registry.current()
+    matches = s.system_search.search(q, limit, group=country)
+    return FastJSONResponse({"count": len(matches), "systems": matches})
 
 
 @app.get("/api/systems/by-name/{system_name}", tags=["Systems"])
@@ -329,23 +584,140 @@ def get_system_by_name(system_name: str):
     Full specification for one system by its display name.
     Falls back to partial matching when exact name is not found.
     """
-    exact = systems_df[systems_df["system_name"].str.lower() == system_name.lower()]
-    if not exact.empty:
-        return to_native(exact.iloc[0].to_dict())
+    s = registry.current()
+    return FastJSONResponse(get_system_row(s, system_name).to_dict())
 
-    partial = systems_df[systems_df["system_name"].str.contains(system_name, case=False, na=False)]
-    if partial.empty:
-        raise HTTPException(404, f"System '{system_name}' not found")
-    if len(partial) > 1:
-        matches = sorted(partial["system_name"].tolist())
-        raise HTTPException(
-            409,
-            f"Multiple systems match '{system_name}'. Please use exact name: {matches}"
-        )
-    return to_native(partial.iloc[0].to_dict())
+
+SIMILAR_COLUMNS = [
+    "system_id", "system_name", "country", "system_type", "classification",
+    "threat_level", "image_url",
+]
+
+@app.get("/api/systems/{system_id}/similar", tags=["Systems"])
+def similar_systems(
+    system_id: str,
+    k: int = Query(10, ge=1, le=100, description="Number of systems to return"),
+    country: Optional[str] = Query(None, description="Only systems from this country"),
+    system_type: Optional[str] = Query(None, description="Only systems of this type"),
+):
+    """
+    The k systems closest in capability to system_id: Euclidean distance
+    over the 12 features Model 1 classifies on, standardised by its scaler.
+    """
+    s = registry.current()
+    pos = s.system_id_index.get(system_id.lower())
+    if pos is None:
+        raise HTTPException(404, f"System '{system_id}' not found")
+
+    mask = None
+    if country or system_type:
+        with span("filter"):
+            mask = np.zeros(len(s.systems_df), dtype=bool)
+            mask[s.system_query.select(equals={"country": country, "system_type": system_type})] = True
+    with span("similar_query"):
+        positions, distances = s.similarity_index.query(pos, k, mask)
+
+    records = system_records(s, positions, SIMILAR_COLUMNS, [])
+    for rec, d in zip(records, distances.tolist()):
+        rec["distance"] = round(d, 4)
+    return FastJSONResponse({
+        "system": system_records(s, [pos], SIMILAR_COLUMNS, [])[0],
+        "count": len(records),
+        "similar": records,
+    })
 
 
 # â”€â”€ Comparison (Feature 1) â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
+COMPARE_SYSTEM_COLUMNS = [
+    "system_id","system_name","classification","year_inducted",
+    "threat_level","stealth_rating","ew_capability",
+    "max_speed_kmph","range_km","reliability",
+    "cost_million_usd","image_url","wikipedia_url",
+    "description","combat_proven","operational_status"
+]
+
+def systems_by_type(s, countries: list) -> dict:
+    """
+    {country: {system_type: system records}} for every country in one
+    df_to_records call over the snapshot's per-country/per-type partitions.
+    """
+    spans = []     # (country, system_type, start, stop) into records
+    positions = []
+    n = 0
+    for country in countries:
+        for system_type, pos in s.type_partitions.get(country, {}).items():
+            spans.append((country, system_type, n, n + len(pos)))
+            positions.append(pos)
+            n += len(pos)
+    with span("filter"):
+        rows = s.systems_df[COMPARE_SYSTEM_COLUMNS].take(np.concatenate(positions)) if positions else None
+    records = df_to_records(rows) if rows is not None else []
+
+    grouped = {country: {} for country in countries}
+    for country, system_type, a, b in spans:
+        grouped[country][system_type] = records[a:b]
+    return grouped
+
+def compare_side(s, row, by_type: dict) -> dict:
+    """One country's block in /api/compare and /api/compare/multi."""
+    force = country_force_summary(s, row["country"])
+    coords = COUNTRY_COORDS.get(row["country"], {"lat": 0, "lng": 0})
+
+    # Radar chart data (normalised 0-100)
+    radar = {
+        "Tech Generation":  round(force["avg_tech_gen"] / 6 * 100, 1),
+        "Threat Level":     round(force["avg_threat_level"] / 10 * 100, 1),
+        "Stealth":          round(force["avg_stealth"] / 10 * 100, 1),
+        "EW Capability":    round(force["avg_ew"] / 10 * 100, 1),
+        "Reliability":      force["avg_reliability"],
+        "Modernity":        force["modern_pct"],
+    }
+
+    # Historical conflict insights (precomputed per snapshot)
+    history = s.scenario_index
+    won   = history.count(row["country"], "attacker", "Attacker_Wins")
+    lost  = history.count(row["country"], "defender", "Attacker_Wins")
+    stale = history.involving(row["country"], "Stalemate")
+
+    return {
+        "country": row["country"],
+        "iso_code": row["iso_code"],
+        "flag_url": row["flag_url"],
+        "risk_zone": row["risk_zone"],
+        "risk_score": row["risk_score"],
+        "zone_color": ZONE_COLORS[row["risk_zone"]],
+        "lat": coords["lat"], "lng": coords["lng"],
+        "gdp_billion_usd": row["gdp_billion_usd"],
+        "military_budget_billion_usd": row["military_budget_billion_usd"],
+        "active_personnel": row["active_personnel"],
+        "combat_aircraft_count": row["combat_aircraft_count"],
+        "nuclear_capable": bool(row["nuclear_capable"]),
+        "alliance": row["alliance"],
+        "key_conflicts": row["key_conflicts"],
+        "relation_with_india": row["relation_with_india"],
+        "force_summary": force,
+        "radar_chart_data": radar,
+        "systems_by_type": by_type,
+        "scenario_stats": {
+            "wins_as_attacker": won,
+            "losses_as_defender": lost,
+            "stalemates": stale,
+        }
+    }
+
+def compare_charts(sides: list, labels: list) -> tuple:
+    """Metric and system-type-count bar chart rows, one key per label."""
+    metrics = list(sides[0]["radar_chart_data"].keys())
+    comparison_chart = [
+        {"metric": m, **{label: side["radar_chart_data"][m] for label, side in zip(labels, sides)}}
+        for m in metrics
+    ]
+    type_chart = [
+        {"type": t.replace("_", " "), **{label: side["force_summary"].get(key, 0) for label, side in zip(labels, sides)}}
+        for t, key in SYSTEM_TYPE_COUNT_KEYS.items()
+    ]
+    return comparison_chart, type_chart
+
 @app.get("/api/compare", tags=["Comparison"])
 def compare_countries(
     country1: str = Query(..., description="First country name"),
@@ -360,110 +732,68 @@ def compare_countries(
       - Bar chart per system type
       - System cards with images
     """
-    def build_side(name: str):
-        row = countries_df[countries_df["country"].str.lower() == name.lower()]
-        if row.empty:
-            raise HTTPException(404, f"Country '{name}' not found")
-        row = row.iloc[0]
-        force = country_force_summary(row["country"])
-        systems = get_country_systems(row["country"])
-        coords = COUNTRY_COORDS.get(row["country"], {"lat": 0, "lng": 0})
-
-        # Radar chart data (normalised 0-100)
-        radar = {
-            "Tech Generation":  round(force["avg_tech_gen"] / 6 * 100, 1),
-            "Threat Level":     round(force["avg_threat_level"] / 10 * 100, 1),
-            "Stealth":          round(force["avg_stealth"] / 10 * 100, 1),
-            "EW Capability":    round(force["avg_ew"] / 10 * 100, 1),
-            "Reliability":      force["avg_reliability"],
-            "Modernity":        force["modern_pct"],
-        }
-
-        # Systems grouped by type
-        by_type = systems.groupby("system_type").apply(
-            lambda g: df_to_records(g[[
-                "system_id","system_name","classification","year_inducted",
-                "threat_level","stealth_rating","ew_capability",
-                "max_speed_kmph","range_km","reliability",
-                "cost_million_usd","image_url","wikipedia_url",
-                "description","combat_proven","operational_status"
-            ]])
-        ).to_dict()
-
-        # Historical conflict insights
-        won   = scenarios_df[(scenarios_df["attacker"] == row["country"]) & (scenarios_df["outcome"] == "Attacker_Wins")]
-        lost  = scenarios_df[(scenarios_df["defender"] == row["country"]) & (scenarios_df["outcome"] == "Attacker_Wins")]
-        stale = scenarios_df[
-            ((scenarios_df["attacker"] == row["country"]) | (scenarios_df["defender"] == row["country"])) &
-            (scenarios_df["outcome"] == "Stalemate")
-        ]
-
-        return {
-            "country": row["country"],
-            "iso_code": row["iso_code"],
-            "flag_url": row["flag_url"],
-            "risk_zone": row["risk_zone"],
-            "risk_score": row["risk_score"],
-            "zone_color": ZONE_COLORS[row["risk_zone"]],
-            "lat": coords["lat"], "lng": coords["lng"],
-            "gdp_billion_usd": row["gdp_billion_usd"],
-            "military_budget_billion_usd": row["military_budget_billion_usd"],
-            "active_personnel": row["active_personnel"],
-            "combat_aircraft_count": row["combat_aircraft_count"],
-            "nuclear_capable": bool(row["nuclear_capable"]),
-            "alliance": row["alliance"],
-            "key_conflicts": row["key_conflicts"],
-            "relation_with_india": row["relation_with_india"],
-            "force_summary": force,
-            "radar_chart_data": radar,
-            "systems_by_type": by_type,
-            "scenario_stats": {
-                "wins_as_attacker": int(len(won)),
-                "losses_as_defender": int(len(lost)),
-                "stalemates": int(len(stale)),
-            }
-        }
+    s = registry.current()
+    row1 = get_country_row(s, country1)
+    row2 = get_country_row(s, country2)
+    by_type = systems_by_type(s, [row1["country"], row2["country"]])
+    side1 = compare_side(s, row1, by_type[row1["country"]])
+    side2 = compare_side(s, row2, by_type[row2["country"]])
+
+    # Direct metric and system type count comparison (for bar charts)
+    comparison_chart, type_chart = compare_charts([side1, side2], [country1, country2])
+
+    # Simulated scenarios between the two, in each direction
+    head_to_head = {
+        f"{side1['country']}_attacking": s.scenario_index.pair(side1["country"], side2["country"]),
+        f"{side2['country']}_attacking": s.scenario_index.pair(side2["country"], side1["country"]),
+    }
 
-    side1 = build_side(country1)
-    side2 = build_side(country2)
+    return FastJSONResponse({
+        "country1": side1,
+        "country2": side2,
+        "comparison_chart": comparison_chart,
+        "type_count_chart": type_chart,
+        "head_to_head": head_to_head,
+    })
 
-    # Direct metric comparison (for bar charts)
-    metrics = list(side1["radar_chart_data"].keys())
-    comparison_chart = [
-        {
-            "metric": m,
-            country1: side1["radar_chart_data"][m],
-            country2: side2["radar_chart_data"][m],
-        }
-        for m in metrics
-    ]
 
-    # System type counts comparison
-    all_types = ["Fighter_Aircraft","SAM_System","UAV_Drone","Helicopter","Radar_System","Interceptor_Missile"]
-    type_chart = [
-        {
-            "type": t.replace("_", " "),
-            country1: side1["force_summary"].get(t.lower().replace("fighter_aircraft","fighter_count")
-                        .replace("sam_system","sam_count")
-                        .replace("uav_drone","uav_count")
-                        .replace("helicopter","helicopter_count")
-                        .replace("radar_system","radar_count")
-                        .replace("interceptor_missile","missile_count"), 0),
-            country2: side2["force_summary"].get(t.lower().replace("fighter_aircraft","fighter_count")
-                        .replace("sam_system","sam_count")
-                        .replace("uav_drone","uav_count")
-                        .replace("helicopter","helicopter_count")
-                        .replace("radar_system","radar_count")
-                        .replace("interceptor_missile","missile_count"), 0),
-        }
-        for t in all_types
-    ]
+@app.get("/api/compare/multi", tags=["Comparison"])
+def compare_countries_multi(
+    countries: str = Query(..., description="Comma-separated country names (2 or more), e.g. India,China,Pakistan"),
+):
+    """
+    N-way comparison: the /api/compare country blocks and charts for every
+    listed country, with chart keys and head_to_head[attacker][defender]
+    by canonical country name. Duplicates are dropped.
+    """
+    s = registry.current()
+    rows = []
+    seen = set()
+    for name in (n.strip() for n in countries.split(",")):
+        if not name:
+            continue
+        pos = get_country_pos(s, name)
+        if pos not in seen:
+            seen.add(pos)
+            rows.append(s.countries_df.iloc[pos])
+    if len(rows) < 2:
+        raise HTTPException(400, "countries must name at least two different countries")
+
+    names = [row["country"] for row in rows]
+    by_type = systems_by_type(s, names)
+    sides = [compare_side(s, row, by_type[row["country"]]) for row in rows]
+    comparison_chart, type_chart = compare_charts(sides, names)
+
+    head_to_head = {
+        att: {dfn: s.scenario_index.pair(att, dfn) for dfn in names if dfn != att}
+        for att in names
+    }
 
-    return to_native({
-        "country1": side1,
-        "country2": side2,
+    return FastJSONResponse({
+        "countries": sides,
         "comparison_chart": comparison_chart,
         "type_count_chart": type_chart,
+        "head_to_head": head_to_head,
     })
 
 
@@ -474,11 +804,12 @@ def get_map_zones():
     All countries with coordinates, risk zone, and colour.
     Frontend uses this to paint the interactive world map.
     """
+    s = registry.current()
     result = []
-    for _, row in countries_df.iterrows():
+    for _, row in s.countries_df.iterrows():
         name = row["country"]
         coords = COUNTRY_COORDS.get(name, {"lat": 0, "lng": 0})
-        force = country_force_summary(name)
+        force = country_force_summary(s, name)
         result.append({
             "country": name,
             "iso_code": row["iso_code"],
@@ -496,7 +827,7 @@ def get_map_zones():
             "relation_with_india": row["relation_with_india"],
         })
 
-    return {
+    return FastJSONResponse({
         "reference_country": "India",
         "zone_legend": {
             "Red":    "Hostile / High Risk",
@@ -505,7 +836,7 @@ def get_map_zones():
         },
         "zone_counts": {z: sum(1 for r in result if r["risk_zone"] == z) for z in ["Red", "Yellow", "Green"]},
         "countries": result
-    }
+    })
 
 
 @app.get("/api/country/{country_name}/insights", tags=["War Prediction"])
@@ -514,31 +845,25 @@ def country_insights(country_name: str):
     Detailed insights for a country when user clicks on map.
     Includes past scenario stats, top threats, strength breakdown.
     """
-    row = countries_df[countries_df["country"].str.lower() == country_name.lower()]
-    if row.empty:
-        raise HTTPException(404, f"Country '{country_name}' not found")
-    row = row.iloc[0]
+    s = registry.current()
+    row = get_country_row(s, country_name)
 
-    force = country_force_summary(row["country"])
-    systems = get_country_systems(row["country"])
+    force = country_force_summary(s, row["country"])
+    systems = get_country_systems(s, row["country"])
 
     # Top 3 most dangerous systems
     top3 = systems.nlargest(3, "threat_level")[
         ["system_name","system_type","threat_level","classification","image_url","description"]
     ]
 
-    # Scenario history
-    att_wins   = scenarios_df[(scenarios_df["attacker"]==row["country"]) & (scenarios_df["outcome"]=="Attacker_Wins")]
-    def_wins   = scenarios_df[(scenarios_df["defender"]==row["country"]) & (scenarios_df["outcome"]=="Defender_Wins")]
-    stalemates = scenarios_df[
-        ((scenarios_df["attacker"]==row["country"]) | (scenarios_df["defender"]==row["country"])) &
-        (scenarios_df["outcome"]=="Stalemate")
-    ]
-    total_scenarios = int(len(att_wins) + len(def_wins) + int(len(stalemates)/2))
+    # Scenario history (precomputed per snapshot)
+    history    = s.scenario_index
+    att_wins   = history.count(row["country"], "attacker", "Attacker_Wins")
+    def_wins   = history.count(row["country"], "defender", "Defender_Wins")
+    stalemates = history.involving(row["country"], "Stalemate")
+    total_scenarios = int(att_wins + def_wins + int(stalemates/2))
 
-    avg_win_prob_as_att = float(
-        scenarios_df[scenarios_df["attacker"]==row["country"]]["attacker_win_probability"].mean()
-    ) if len(att_wins) > 0 else 0.5
+    avg_win_prob_as_att = history.avg_win_prob_as_attacker(row["country"]) if att_wins > 0 else 0.5
 
     # Strength score (0-100) for the gauge widget
     strength_score = round(
@@ -549,7 +874,7 @@ def country_insights(country_name: str):
         1
     )
 
-    return to_native({
+    return FastJSONResponse({
         "country": row["country"],
         "flag_url": row["flag_url"],
         "iso_code": row["iso_code"],
@@ -568,56 +893,42 @@ def country_insights(country_name: str):
         "strength_score": strength_score,
         "top_3_systems": df_to_records(top3),
         "scenario_history": {
-            "wins_as_attacker": int(len(att_wins)),
-            "wins_as_defender": int(len(def_wins)),
-            "stalemates": int(len(stalemates)),
+            "wins_as_attacker": att_wins,
+            "wins_as_defender": def_wins,
+            "stalemates": stalemates,
             "total_simulated": total_scenarios,
             "avg_win_probability_when_attacking": round(avg_win_prob_as_att, 3),
         },
         "systems_breakdown": {
-            "by_classification": systems["classification"].value_counts().to_dict(),
-            "by_type": systems["system_type"].value_counts().to_dict(),
+            "by_classification": value_counts_dict(systems["classification"]),
+            "by_type": value_counts_dict(systems["system_type"]),
         }
     })
 
 
 # â”€â”€ Predictions â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
+async def system_predictions(s):
+    """
+    The snapshot's catalogue-wide Model 1 cache. If the warmup has not
+    built it yet it is scored on the inference pool, off the event loop.
+    """
+    if not s.system_predictions_ready:
+        await inference.run("model1", lambda: s.system_predictions)
+    return s.system_predictions
+
+
 @app.post("/api/predict/classify-system", tags=["ML Predictions"])
-def classify_system(data: SystemClassifyInput):
+async def classify_system(data: SystemClassifyInput):
     """
     Model 1: Classify an existing system selected by name.
     Frontend should send one selected name from dropdown.
     """
-    exact = systems_df[systems_df["system_name"].str.lower() == data.system_name.lower()]
-    if not exact.empty:
-        row = exact.iloc[0]
-    else:
-        partial = systems_df[systems_df["system_name"].str.contains(data.system_name, case=False, na=False)]
-        if partial.empty:
-            raise HTTPException(404, f"System '{data.system_name}' not found")
-        if len(partial) > 1:
-            matches = sorted(partial["system_name"].tolist())
-            raise HTTPException(
-                409,
-                f"Multiple systems match '{data.system_name}'. Please use exact name: {matches}"
-            )
-        row = partial.iloc[0]
-
-    type_encoded = int(sys_type_enc.transform([row["system_type"]])[0])
-    features = [
-        float(row["tech_generation"]), int(row["year_inducted"]), float(row["stealth_rating"]),
-        float(row["ew_capability"]), float(row["max_speed_kmph"]), float(row["range_km"]),
-        float(row["max_altitude_m"]), float(row["reliability"]), float(row["cost_million_usd"]),
-        float(row["threat_level"]), float(row.get("payload_kg", 0.0)), type_encoded
-    ]
-
-    X = scaler_m1.transform([features])
-    prediction  = model1.predict(X)[0]
-    proba       = model1.predict_proba(X)[0]
-    classes     = model1.classes_
-    conf_dict = {c: round(float(p), 3) for c, p in zip(classes, proba)}
+    s = registry.current()
+    pos = get_system_pos(s, data.system_name)
+    row = s.systems_df.iloc[pos]
+    prediction = (await system_predictions(s)).by_position[pos]
 
-    return to_native({
+    return FastJSONResponse({
         "selected_system": {
             "system_id": row["system_id"],
             "system_name": row["system_name"],
@@ -638,85 +949,237 @@ def classify_system(data: SystemClassifyInput):
             },
             "dataset_classification": row["classification"],
         },
-        "prediction": {
-            "classification": prediction,
-            "confidence": round(float(max(proba)), 3),
-            "probabilities": conf_dict,
-        },
-        "model": MODEL1_ALGO,
-        "model_accuracy": MODEL1_ACC,
+        "prediction": prediction,
+        "model": s.model1_algo,
+        "model_accuracy": s.model1_acc,
     })
 
 
+# Each name without an exact match costs a substring scan of the catalogue
+MAX_CLASSIFY_BATCH = 1000
+
+@app.post("/api/predict/classify-system/batch", tags=["ML Predictions"])
+def classify_system_batch(data: SystemClassifyBatchInput):
+    """
+    Model 1 for many systems in one request.
+    Select systems by name (exact or unique partial, at most
+    MAX_CLASSIFY_BATCH), optionally narrowed by country and/or system_type;
+    an empty body classifies the whole catalogue. Results are one per
+    distinct system, in catalogue order (names resolving to the same system
+    share one result). Names that cannot be resolved are reported under
+    "unmatched", in request order.
+    """
+    s = registry.current()
+    unmatched = []
+    if data.system_names:
+        if len(data.system_names) > MAX_CLASSIFY_BATCH:
+            raise HTTPException(400, f"At most {MAX_CLASSIFY_BATCH} system names per request")
+        positions = []
+        for name in data.system_names:
+            try:
+                positions.append(get_system_pos(s, name))
+            except HTTPException as e:
+                unmatched.append({"system_name": name, "status": e.status_code, "detail": e.detail})
+        positions = np.array(sorted(set(positions)), dtype=np.intp)
+    else:
+        positions = np.arange(len(s.systems_df))
+
+    with span("filter"):
+        mask = np.ones(len(positions), dtype=bool)
+        if data.country:
+            mask &= category_mask(s.systems_df["country"], data.country)[positions]
+        if data.system_type:
+            mask &= category_mask(s.systems_df["system_type"], data.system_type)[positions]
+        positions = positions[mask]
+
+    if len(positions) == 0:
+        raise HTTPException(404, "No systems match the given names/filters")
+
+    # Name resolution and formatting stay on the worker thread (a plain def);
+    # only an unbuilt prediction cache goes to the inference pool, as in list_systems
+    if not s.system_predictions_ready:
+        from_thread.run(system_predictions, s)
+    subset = s.systems_df.iloc[positions]
+    cached = s.system_predictions.by_position
+    predictions = [cached[p] for p in positions]
+    results = [
+        {
+            "system_id": sid,
+            "system_name": name,
+            "country": country,
+            "system_type": stype,
+            "dataset_classification": cls,
+            "prediction": pred,
+        }
+        for sid, name, country, stype, cls, pred in zip(
+            subset["system_id"], subset["system_name"], subset["country"],
+            subset["system_type"], subset["classification"], predictions,
+        )
+    ]
+    return FastJSONResponse({
+        "count": len(results),
+        "results": results,
+        "unmatched": unmatched,
+        "model": s.model1_algo,
+        "model_accuracy": s.model1_acc,
+    })
+
+
+MAX_WAR_BATCH = 5000
+MAX_MC_SAMPLES = 200000
+
+def warm_snapshot():
+    try:
+        registry.current().warm()
+    except ModelUnavailableError:
+        pass  # reported per model on / and /api/admin/status
+    freeze_snapshot()  # now including the models and model-backed caches
+
+@app.on_event("startup")
+def warm_models():
+    # Load models and build the war matrix in the background so the API
+    # starts serving straight away; the first request to need a model
+    # loads it if the warmup has not got there yet.
+    if WARMUP:
+        threading.Thread(target=warm_snapshot, name="model-warmup", daemon=True).start()
+    if WATCH_INTERVAL > 0:
+        registry.watch(WATCH_INTERVAL)
+
+def predict_war_pairs(s, att_pos, dfn_pos) -> list:
+    """
+    Results for many attacker/defender pairs (s.countries_df row positions).
+    Read from the snapshot's precomputed matrix once it is built; until then
+    scored live with one scaler transform and one call per model over the whole batch.
+    """
+    att_pos = np.asarray(att_pos, dtype=np.intp)
+    dfn_pos = np.asarray(dfn_pos, dtype=np.intp)
+    matrix = s.war_matrix
+    if matrix is not None:
+        scored = matrix.lookup(att_pos, dfn_pos)
+    else:
+        scored = score_pairs(
+            s.war_side_features, att_pos, dfn_pos, s.war_scaler, s.predictor("model2"), s.predictor("model3")
+        )
+
+    names = s.countries_df["country"].tolist()
+    att_names = [names[a] for a in att_pos.tolist()]
+    dfn_names = [names[d] for d in dfn_pos.tolist()]
+    return [
+        {"attacker": att, "defender": dfn, **result}
+        for att, dfn, result in zip(att_names, dfn_names, war_results(s, scored, att_names, dfn_names))
+    ]
+
+
+def war_results(s, scored: dict, att_names: list, dfn_names: list) -> list:
+    """{"prediction", "advantage_factors"} per scored row (see war.score_pairs())."""
+    classes  = s.predictor("model2").classes_.tolist()
+    ratios   = {k: v.tolist() for k, v in scored["ratios"].items()}
+    outcome_idx = scored["outcome_idx"].tolist()
+    proba    = scored["proba"].tolist()
+    win_prob = scored["win_prob"].tolist()
+    att_loss = scored["att_loss"].tolist()
+    dfn_loss = scored["dfn_loss"].tolist()
+    duration = scored["duration"].tolist()
+
+    results = []
+    for k, (att, dfn) in enumerate(zip(att_names, dfn_names)):
+        outcome = classes[outcome_idx[k]]
+        results.append({
+            "prediction": {
+                "outcome": outcome,
+                "outcome_description": OUTCOME_DESCRIPTIONS[outcome].format(att=att, dfn=dfn),
+                "attacker_win_probability": round(win_prob[k], 3),
+                "outcome_probabilities": {c: round(p, 3) for c, p in zip(classes, proba[k])},
+                "estimated_attacker_loss_pct": round(att_loss[k], 1),
+                "estimated_defender_loss_pct": round(dfn_loss[k], 1),
+                "estimated_duration_days": duration[k],
+            },
+            "advantage_factors": {key: round(v[k], 3) for key, v in ratios.items()},
+        })
+    return results
+
+
+def predict_war_items(items) -> list:
+    """
+    Micro-batch entry point: items are (snapshot, att_pos, dfn_pos) from
+    concurrent requests; pairs from the same snapshot are scored together.
+    """
+    results = [None] * len(items)
+    groups = {}
+    for k, (s, a, d) in enumerate(items):
+        groups.setdefault(id(s), (s, []))[1].append(k)
+    for s, ks in groups.values():
+        scored = predict_war_pairs(s, [items[k][1] for k in ks], [items[k][2] for k in ks])
+        for k, result in zip(ks, scored):
+            results[k] = result
+    return results
+
+
+def monte_carlo_local(s, att, dfn, chunks: list, noise: float) -> list:
+    return score_chunks(att, dfn, chunks, noise, s.war_scaler, s.predictor("model2"), s.predictor("model3"))
+
+async def war_uncertainty(s, att_pos: int, dfn_pos: int, samples: int, noise: float,
+                          seed: Optional[int], percentiles: Optional[str]) -> dict:
+    """Monte Carlo bands for one pair (see src/montecarlo.py)."""
+    qs = DEFAULT_PERCENTILES
+    if percentiles:
+        try:
+            qs = tuple(float(p) for p in percentiles.split(",") if p.strip())
+        except ValueError:
+            raise HTTPException(400, "percentiles must be comma-separated numbers, e.g. 5,50,95")
+        if not qs or any(not 0 <= p <= 100 for p in qs):
+            raise HTTPException(400, "percentiles must lie between 0 and 100")
+    if seed is None:
+        seed = int(np.random.SeedSequence().entropy % 2**32)  # reported, so the run can be repeated
+
+    att = s.war_side_features[att_pos]
+    dfn = s.war_side_features[dfn_pos]
+    chunks = sample_chunks(samples, seed)
+    if sample_pool.processes > 1 and samples >= MC_POOL_MIN_SAMPLES:
+        parts = await sample_pool.run(s, att, dfn, chunks, noise)
+    else:
+        parts = await inference.run("war", monte_carlo_local, s, att, dfn, chunks, noise)
+    return {
+        "samples": samples,
+        "noise": noise,
+        "seed": seed,
+        **summarise(parts, s.predictor("model2").classes_.tolist(), qs),
+    }
+
+
 @app.get("/api/predict/war", tags=["ML Predictions"])
-def predict_war(
+async def predict_war(
     attacker_country: str = Query(..., description="Attacker country name from dropdown"),
     defender_country: str = Query(..., description="Defender country name from dropdown"),
+    samples: Optional[int] = Query(None, ge=1, le=MAX_MC_SAMPLES, description="Add Monte Carlo uncertainty bands from N perturbed samples"),
+    noise: float = Query(0.1, gt=0, le=0.5, description="Relative perturbation bound for force-summary features (0.1 = +/-10%)"),
+    seed: Optional[int] = Query(None, ge=0, description="Random seed for repeatable bands"),
+    percentiles: Optional[str] = Query(None, description="Comma-separated percentiles (default 5,25,50,75,95)"),
 ):
     """
     Models 2 & 3: Predict war scenario outcome from selected country names.
+    With samples=N, also perturbs both sides' force-summary features by
+    uniform noise within +/-noise, scores all N samples as one batch and
+    returns percentiles of win probability, losses and duration.
     """
+    s = registry.current()
     if attacker_country.lower() == defender_country.lower():
         raise HTTPException(400, "Attacker and defender must be different countries")
 
-    def get_country_row(name: str):
-        row = countries_df[countries_df["country"].str.lower() == name.lower()]
-        if row.empty:
-            raise HTTPException(404, f"Country '{name}' not found")
-        return row.iloc[0]
-
-    att_row = get_country_row(attacker_country)
-    dfn_row = get_country_row(defender_country)
-    att_fs  = country_force_summary(att_row["country"])
-    dfn_fs  = country_force_summary(dfn_row["country"])
-
-    zone_map = {"Red": 3, "Yellow": 2, "Green": 1}
-
-    att_budget  = float(att_row["military_budget_billion_usd"])
-    dfn_budget  = float(dfn_row["military_budget_billion_usd"])
-    att_ac      = float(att_row["combat_aircraft_count"])
-    dfn_ac      = float(dfn_row["combat_aircraft_count"])
-
-    threat_ratio  = att_fs["avg_threat_level"] / max(dfn_fs["avg_threat_level"], 0.01)
-    tech_ratio    = att_fs["avg_tech_gen"]      / max(dfn_fs["avg_tech_gen"],    0.01)
-    number_ratio  = att_ac / max(dfn_ac, 1)
-    budget_ratio  = att_budget / max(dfn_budget, 0.01)
-
-    features = [
-        att_fs["avg_threat_level"], att_fs["avg_tech_gen"], att_fs["modern_pct"],
-        att_fs["avg_stealth"], att_fs["avg_ew"],
-        att_fs["fighter_count"], att_fs["sam_count"], att_fs["uav_count"],
-        att_budget, att_ac, zone_map[att_row["risk_zone"]],
-
-        dfn_fs["avg_threat_level"], dfn_fs["avg_tech_gen"], dfn_fs["modern_pct"],
-        dfn_fs["avg_stealth"], dfn_fs["avg_ew"],
-        dfn_fs["fighter_count"], dfn_fs["sam_count"], dfn_fs["uav_count"],
-        dfn_budget, dfn_ac, zone_map[dfn_row["risk_zone"]],
-
-        round(threat_ratio, 3), round(tech_ratio, 3),
-        round(number_ratio, 3), round(min(budget_ratio, 100), 3),
-    ]
-
-    X = scaler_m2.transform([features])
-
-    outcome  = model2.predict(X)[0]
-    proba2   = model2.predict_proba(X)[0]
-    classes2 = model2.classes_
-    outcome_probs = {c: round(float(p), 3) for c, p in zip(classes2, proba2)}
-
-    win_prob = float(np.clip(model3.predict(X)[0], 0, 1))
-
-    att_loss = round(float(np.clip((1 - win_prob) * 40, 5, 75)), 1)
-    dfn_loss = round(float(np.clip(win_prob * 40, 5, 75)), 1)
-    duration = max(3, int(15 * (1 / max(abs(win_prob - 0.5) * 2, 0.05))))
+    att_pos = get_country_pos(s, attacker_country)
+    dfn_pos = get_country_pos(s, defender_country)
+    att_row = s.countries_df.iloc[att_pos]
+    dfn_row = s.countries_df.iloc[dfn_pos]
+    att_fs  = country_force_summary(s, att_row["country"])
+    dfn_fs  = country_force_summary(s, dfn_row["country"])
 
-    outcome_descriptions = {
-        "Attacker_Wins": f"{att_row['country']} forces achieve air superiority. Significant degradation of {dfn_row['country']} air defence network.",
-        "Defender_Wins": f"{dfn_row['country']} successfully repels the air campaign. {att_row['country']} forces suffer heavy attrition.",
-        "Stalemate": f"Neither side achieves decisive air superiority. Prolonged attritional air war with heavy losses on both sides.",
-    }
+    if s.war_matrix is not None:
+        result = predict_war_pairs(s, [att_pos], [dfn_pos])[0]
+    else:
+        # Matrix still warming: score live, batched with concurrent requests
+        result = await inference.submit("war", predict_war_items, (s, att_pos, dfn_pos))
 
-    return to_native({
+    body = {
         "attacker": {
             "country": att_row["country"],
             "flag_url": att_row["flag_url"],
@@ -733,47 +1196,286 @@ def predict_war(
             "nuclear_capable": bool(dfn_row["nuclear_capable"]),
             **dfn_fs,
         },
-        "prediction": {
-            "outcome": outcome,
-            "outcome_description": outcome_descriptions[outcome],
-            "attacker_win_probability": round(win_prob, 3),
-            "outcome_probabilities": outcome_probs,
-            "estimated_attacker_loss_pct": att_loss,
-            "estimated_defender_loss_pct": dfn_loss,
-            "estimated_duration_days": duration,
-        },
-        "advantage_factors": {
-            "threat_ratio": round(threat_ratio, 3),
-            "tech_ratio": round(tech_ratio, 3),
-            "numbers_ratio": round(number_ratio, 3),
-            "budget_ratio": round(min(budget_ratio, 100), 3),
-        },
-        "model": MODEL2_ALGO,
-        "model_accuracy": MODEL2_ACC,
+        "prediction": result["prediction"],
+        "advantage_factors": result["advantage_factors"],
+        "model": s.model2_algo,
+        "model_accuracy": s.model2_acc,
+    }
+    if samples:
+        body["uncertainty"] = await war_uncertainty(s, att_pos, dfn_pos, samples, noise, seed, percentiles)
+    return FastJSONResponse(body)
+
+
+@app.post("/api/predict/war/batch", tags=["ML Predictions"])
+async def predict_war_batch(data: WarBatchInput):
+    """
+    Models 2 & 3 for many attacker/defender pairs in one request.
+    Send a list of pairs, or all_pairs=true for every ordered pair of countries.
+    All pairs are scored together in a single pass through each model.
+    """
+    s = registry.current()
+    if data.all_pairs:
+        n = len(s.countries_df)
+        att_pos, dfn_pos = np.nonzero(~np.eye(n, dtype=bool))
+    else:
+        if not data.pairs:
+            raise HTTPException(400, "Provide at least one pair or set all_pairs=true")
+        if len(data.pairs) > MAX_WAR_BATCH:
+            raise HTTPException(400, f"At most {MAX_WAR_BATCH} pairs per request")
+        att_pos, dfn_pos = [], []
+        for pair in data.pairs:
+            if pair.attacker_country.lower() == pair.defender_country.lower():
+                raise HTTPException(
+                    400,
+                    f"Attacker and defender must be different countries ('{pair.attacker_country}')"
+                )
+            att_pos.append(get_country_pos(s, pair.attacker_country))
+            dfn_pos.append(get_country_pos(s, pair.defender_country))
+
+    results = await inference.run("war", predict_war_pairs, s, att_pos, dfn_pos)
+    return FastJSONResponse({
+        "count": len(results),
+        "predictions": results,
+        "model": s.model2_algo,
+        "model_accuracy": s.model2_acc,
     })
+
+
+MAX_SIMULATION_VARIANTS = 10000
+MAX_SIMULATION_AXES = 8
+# Largest change (either sign) an axis may apply, per change type
+SIMULATION_LIMITS = {
+    "fighter_count":   10000,
+    "sam_count":       10000,
+    "uav_count":       10000,
+    "aircraft_count":  50000,
+    "military_budget": 10000,   # billion USD
+    "system":          1000,    # copies of one catalogue system
+}
+
+def axis_values(axis: SimulationAxis) -> np.ndarray:
+    """An axis's explicit values, or its inclusive start..stop range."""
+    if axis.values is not None:
+        values = np.asarray(axis.values, dtype=np.float64)
+    elif axis.start is not None and axis.stop is not None:
+        if not all(math.isfinite(v) for v in (axis.start, axis.stop, axis.step)):
+            raise HTTPException(400, "Axis start, stop and step must be finite")
+        if axis.step <= 0 or axis.stop < axis.start:
+            raise HTTPException(400, "Axis ranges need step > 0 and stop >= start")
+        count = int(np.floor((axis.stop - axis.start) / axis.step + 1e-9)) + 1
+        if count > MAX_SIMULATION_VARIANTS:
+            raise HTTPException(400, f"At most {MAX_SIMULATION_VARIANTS} variants per request")
+        values = np.round(axis.start + axis.step * np.arange(count), 9)
+    else:
+        raise HTTPException(400, "Each axis needs values or start and stop")
+    if len(values) == 0:
+        raise HTTPException(400, "Each axis needs at least one value")
+    if len(values) > MAX_SIMULATION_VARIANTS:
+        raise HTTPException(400, f"At most {MAX_SIMULATION_VARIANTS} variants per request")
+    if not np.isfinite(values).all():
+        raise HTTPException(400, "Axis values must be finite")
+    limit = SIMULATION_LIMITS[axis.change]
+    if np.abs(values).max() > limit:
+        raise HTTPException(400, f"{axis.change} changes must lie between -{limit} and {limit}")
+    if axis.change != "military_budget" and not np.array_equal(values, np.round(values)):
+        raise HTTPException(400, f"{axis.change} changes must be whole numbers")
+    return values
+
+def axis_label(axis: SimulationAxis) -> str:
+    if axis.change == "system":
+        return f"{axis.side}.system:{axis.system_name}"
+    return f"{axis.side}.{axis.change}"
+
+@app.post("/api/simulate/war", tags=["ML Predictions"])
+async def simulate_war(data: WarSimulationInput):
+    """
+    What-if grid for one attacker/defender pair. Each axis varies one
+    change to one side: a delta to fighter_count, sam_count, uav_count,
+    military_budget (billion USD) or aircraft_count, or copies of a
+    catalogue system added by name (negative: removed), which also moves
+    the side's average threat/tech/stealth/EW and modern share.
+    Every combination of axis values is a variant; all variants are built
+    with array operations and scored in one pass through each model.
+
+    e.g. {"attacker_country": "China", "defender_country": "India", "axes": [
+          {"side": "defender", "change": "fighter_count", "start": 0, "stop": 20},
+          {"side": "defender", "change": "sam_count", "start": 0, "stop": 10}]}
+    """
+    s = registry.current()
+    # Up to MAX_SIMULATION_VARIANTS rows to build, score, format and render:
+    # one job on the "war" executor, so the loop only gets the finished response
+    return await inference.run("war", simulate_war_response, s, data)
+
+
+def simulate_war_response(s, data: WarSimulationInput) -> FastJSONResponse:
+    """The whole of /api/simulate/war for snapshot s (see simulate_war())."""
+    if data.attacker_country.lower() == data.defender_country.lower():
+        raise HTTPException(400, "Attacker and defender must be different countries")
+    if not data.axes:
+        raise HTTPException(400, "Provide at least one axis")
+    if len(data.axes) > MAX_SIMULATION_AXES:
+        raise HTTPException(400, f"At most {MAX_SIMULATION_AXES} axes per request")
+    att_pos = get_country_pos(s, data.attacker_country)
+    dfn_pos = get_country_pos(s, data.defender_country)
+    names = s.countries_df["country"].tolist()
+
+    values = [axis_values(axis) for axis in data.axes]
+    n_variants = math.prod(len(v) for v in values)  # Python ints: no overflow
+    if n_variants > MAX_SIMULATION_VARIANTS:
+        raise HTTPException(400, f"At most {MAX_SIMULATION_VARIANTS} variants per request (got {n_variants})")
+    # One column per axis over the grid; row 0 is the unchanged baseline
+    columns = [np.concatenate([[0.0], g.ravel()]) for g in np.meshgrid(*values, indexing="ij")]
+
+    sides = {}
+    for side, pos in (("attacker", att_pos), ("defender", dfn_pos)):
+        country = names[pos]
+        systems = get_country_systems(s, country)
+        deltas, added, removed = {}, [], {}
+        for axis, column in zip(data.axes, columns):
+            if axis.side != side:
+                continue
+            if axis.change != "system":
+                deltas[axis.change] = deltas.get(axis.change, 0) + column
+                continue
+            if not axis.system_name:
+                raise HTTPException(400, "change='system' needs system_name")
+            row = get_system_row(s, axis.system_name)
+            added.append((row, column))
+            removed[row["system_name"]] = removed.get(row["system_name"], 0) + column
+        for system_name, total in removed.items():
+            owned = int((systems["system_name"] == system_name).sum())
+            if total.min() < -owned:
+                raise HTTPException(
+                    400, f"{country} has {owned} '{system_name}'; cannot remove {int(-total.min())}"
+                )
+        sides[side] = simulate_side(s.war_side_features[pos], systems, deltas, added, n_variants + 1)
+        negative = [f for f in SIMULATED_DELTAS if (sides[side][:, SIDE_INDEX[f]] < 0).any()]
+        if negative:
+            raise HTTPException(400, f"Changes take {country}'s {negative} below zero")
+
+    scored = score_sides(
+        sides["attacker"], sides["defender"], s.war_scaler, s.predictor("model2"), s.predictor("model3")
+    )
+    att, dfn = names[att_pos], names[dfn_pos]
+    results = war_results(s, scored, [att] * (n_variants + 1), [dfn] * (n_variants + 1))
+
+    labels = [axis_label(axis) for axis in data.axes]
+    grid = [
+        column[1:].tolist() if axis.change == "military_budget" else column[1:].astype(np.int64).tolist()
+        for axis, column in zip(data.axes, columns)
+    ]
+    variants = [
+        {"changes": {label: g[k] for label, g in zip(labels, grid)}, **result}
+        for k, result in enumerate(results[1:])
+    ]
+    return FastJSONResponse({
+        "attacker": att,
+        "defender": dfn,
+        "axes": [
+            {"label": label, "values": v.tolist() if axis.change == "military_budget" else v.astype(np.int64).tolist()}
+            for label, axis, v in zip(labels, data.axes, values)
+        ],
+        "variant_count": n_variants,
+        "baseline": results[0],
+        "variants": variants,
+        "model": s.model2_algo,
+        "model_accuracy": s.model2_acc,
+    }, chunked="variants")
 # â”€â”€ Dashboard Stats â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
 @app.get("/api/stats/overview", tags=["Dashboard"])
 def overview_stats():
     """Overview stats for the main dashboard / landing page."""
-    return {
-        "total_countries": int(len(countries_df)),
-        "total_systems":   int(len(systems_df)),
-        "modern_systems":  int((systems_df["classification"] == "Modern").sum()),
-        "traditional_systems": int((systems_df["classification"] == "Traditional").sum()),
-        "total_scenarios": int(len(scenarios_df)),
-        "risk_zone_counts": countries_df["risk_zone"].value_counts().to_dict(),
-        "system_type_counts": systems_df["system_type"].value_counts().to_dict(),
+    s = registry.current()
+    return FastJSONResponse({
+        "total_countries": int(len(s.countries_df)),
+        "total_systems":   int(len(s.systems_df)),
+        "modern_systems":  int((s.systems_df["classification"] == "Modern").sum()),
+        "traditional_systems": int((s.systems_df["classification"] == "Traditional").sum()),
+        "total_scenarios": int(len(s.scenarios_df)),
+        "risk_zone_counts": value_counts_dict(s.countries_df["risk_zone"]),
+        "system_type_counts": value_counts_dict(s.systems_df["system_type"]),
         "top_threat_systems": df_to_records(
-            systems_df.nlargest(5, "threat_level")[
+            s.systems_df.nlargest(5, "threat_level")[
                 ["system_name","country","threat_level","classification","image_url"]
             ]
         ),
-        "countries_list": sorted(countries_df["country"].tolist()),
-    }
+        "countries_list": sorted(s.countries_df["country"].tolist()),
+    })
 
 
 # â”€â”€ Model Info â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
 @app.get("/api/models/info", tags=["Dashboard"])
 def models_info():
     """Returns metadata about all trained ML models."""
-    return model_meta
+    s = registry.current()
+    return FastJSONResponse(s.model_meta)
+
+
+# â”€â”€ Admin â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
+def require_admin(request: Request):
+    if not ADMIN_TOKEN:
+        if ADMIN_OPEN:
+            return
+        raise HTTPException(403, "Admin endpoints are disabled; set AIRDEF_ADMIN_TOKEN (or AIRDEF_ADMIN_OPEN=1)")
+    if not hmac.compare_digest(request.headers.get("x-admin-token", ""), ADMIN_TOKEN):
+        raise HTTPException(403, "Invalid or missing X-Admin-Token")
+
+
+@app.post("/api/admin/reload", tags=["Admin"])
+def reload_artifacts(
+    request: Request,
+    force: bool = Query(False, description="Reload even if data/ and models/ are unchanged"),
+    wait: bool = Query(False, description="Block until the new version is live"),
+):
+    """
+    Reload data/ CSVs and model pickles without restarting the server.
+    The new set is validated and indexed off to the side; requests keep
+    using the current version until it is swapped in. A failed reload
+    leaves the current version live.
+    """
+    require_admin(request)
+    if not wait:
+        started = registry.reload_in_background(force)
+        return FastJSONResponse(
+            {"started": started, **registry.status()},
+            status_code=202 if started else 409,
+        )
+    try:
+        reloaded = registry.reload(force)
+    except Exception as e:
+        raise HTTPException(422, f"Reload failed, keeping version {registry.current().version}: {e}")
+    return FastJSONResponse({"reloaded": reloaded, **registry.status()})
+
+
+@app.get("/api/admin/status", tags=["Admin"])
+def admin_status(request: Request):
+    """Loaded data/model version, reload state, inference pool and response cache."""
+    require_admin(request)
+    return FastJSONResponse({
+        **registry.status(),
+        "inference": inference.status(),
+        "monte_carlo": sample_pool.status(),
+        "response_cache": {
+            "entries": len(response_cache),
+            "hits": response_cache.hits,
+            "misses": response_cache.misses,
+        },
+    })
+
+
+# â”€â”€ Metrics â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
+metrics.value("airdef_response_cache_entries", "Serialized responses held in the cache.", lambda: len(response_cache))
+metrics.value("airdef_response_cache_hits_total", "Response cache hits.", lambda: response_cache.hits, "counter")
+metrics.value("airdef_response_cache_misses_total", "Response cache misses.", lambda: response_cache.misses, "counter")
+metrics.value("airdef_reloads_total", "Successful data/model reloads.", lambda: registry.reload_count, "counter")
+
+
+@app.get("/metrics", tags=["Admin"], response_class=PlainTextResponse)
+def prometheus_metrics():
+    """
+    Prometheus text format: per-route request counts, latency and response
+    size histograms, span timings inside the hot paths (filter,
+    force_summary, scaler_transform, model_predict, df_to_records,
+    serialize_json) and cache/reload counters. Per worker process.
+    """
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,172 @@
+"""
+DRDO Air Defence ML Project
+In-process request metrics and timing spans, rendered in the Prometheus
+text exposition format for GET /metrics.
+
+Counters and histograms live in one process; with several workers
+(src/serve.py) each worker reports its own, so scrape every worker or
+read them as per-process samples.
+"""
+
+from bisect import bisect_left
+import threading
+import time
+
+# Request/span latency bucket bounds, seconds
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Response size bucket bounds, bytes
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+
+class Histogram:
+    """Cumulative-on-render bucket counts plus sum and count."""
+
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: tuple):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Span:
+    """Context manager timing one block into metrics' span histogram."""
+
+    __slots__ = ("metrics", "name", "started")
+
+    def __init__(self, metrics, name: str):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe_span(self.name, time.perf_counter() - self.started)
+        return False
+
+
+class Metrics:
+    """
+    Per-route request counts, latency and response size histograms, named
+    span histograms, and values read from callbacks at render time.
+    Thread-safe.
+    """
+
+    def __init__(self, latency_buckets: tuple = LATENCY_BUCKETS, size_buckets: tuple = SIZE_BUCKETS):
+        self.latency_buckets = latency_buckets
+        self.size_buckets = size_buckets
+        self._lock = threading.Lock()
+        self.requests = {}   # (method, route, status) -> count
+        self.latency = {}    # (method, route) -> Histogram
+        self.sizes = {}      # (method, route) -> Histogram
+        self.spans = {}      # name -> Histogram
+        self.in_flight = 0
+        self._values = []    # (name, kind, help, fn() -> number)
+
+    def span(self, name: str) -> Span:
+        """with metrics.span("model_predict"): ... records the block's duration."""
+        return Span(self, name)
+
+    def add_in_flight(self, delta: int):
+        with self._lock:
+            self.in_flight += delta
+
+    def observe_span(self, name: str, seconds: float):
+        with self._lock:
+            hist = self.spans.get(name)
+            if hist is None:
+                hist = self.spans[name] = Histogram(self.latency_buckets)
+            hist.observe(seconds)
+
+    def observe_request(self, method: str, route: str, status: int, seconds: float, size: int = None):
+        key = (method, route)
+        with self._lock:
+            self.requests[key + (status,)] = self.requests.get(key + (status,), 0) + 1
+            hist = self.latency.get(key)
+            if hist is None:
+                hist = self.latency[key] = Histogram(self.latency_buckets)
+            hist.observe(seconds)
+            if size is not None:
+                hist = self.sizes.get(key)
+                if hist is None:
+                    hist = self.sizes[key] = Histogram(self.size_buckets)
+                hist.observe(size)
+
+    def value(self, name: str, help: str, fn, kind: str = "gauge"):
+        """Report fn()'s value under name on every render (kind "gauge" or "counter")."""
+        self._values.append((name, kind, help, fn))
+
+    def render(self) -> str:
+        """Everything in the Prometheus text format (version 0.0.4)."""
+        with self._lock:
+            requests = dict(self.requests)
+            latency = {k: _copy(h) for k, h in self.latency.items()}
+            sizes = {k: _copy(h) for k, h in self.sizes.items()}
+            spans = {k: _copy(h) for k, h in self.spans.items()}
+            in_flight = self.in_flight
+
+        lines = [
+            "# HELP airdef_http_requests_total Requests handled, by route and status.",
+            "# TYPE airdef_http_requests_total counter",
+        ]
+        for (method, route, status), n in sorted(requests.items()):
+            lines.append(f'airdef_http_requests_total{_labels(method=method, route=route, status=status)} {n}')
+        lines += [
+            "# HELP airdef_http_requests_in_flight Requests currently being handled.",
+            "# TYPE airdef_http_requests_in_flight gauge",
+            f"airdef_http_requests_in_flight {in_flight}",
+        ]
+        _histograms(lines, "airdef_http_request_duration_seconds", "Request latency, by route.",
+                    {(("method", m), ("route", r)): h for (m, r), h in latency.items()})
+        _histograms(lines, "airdef_http_response_size_bytes", "Response body size, by route.",
+                    {(("method", m), ("route", r)): h for (m, r), h in sizes.items()})
+        _histograms(lines, "airdef_span_duration_seconds",
+                    "Time inside instrumented hot paths (filtering, scoring, serialization).",
+                    {(("span", name),): h for name, h in spans.items()})
+        for name, kind, help, fn in self._values:
+            lines += [f"# HELP {name} {help}", f"# TYPE {name} {kind}", f"{name} {_number(fn())}"]
+        return "\n".join(lines) + "\n"
+
+
+def _copy(hist: Histogram) -> Histogram:
+    out = Histogram(hist.bounds)
+    out.counts, out.sum, out.count = list(hist.counts), hist.sum, hist.count
+    return out
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels) -> str:
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+def _number(value) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(int(value))
+
+
+def _histograms(lines: list, name: str, help: str, series: dict):
+    lines += [f"# HELP {name} {help}", f"# TYPE {name} histogram"]
+    for labels, hist in sorted(series.items()):
+        base = dict(labels)
+        cumulative = 0
+        for bound, n in zip(hist.bounds + (float("inf"),), hist.counts):
+            cumulative += n
+            le = "+Inf" if bound == float("inf") else repr(float(bound))
+            lines.append(f"{name}_bucket{_labels(**base, le=le)} {cumulative}")
+        lines.append(f"{name}_sum{_labels(**base)} {hist.sum!r}")
+        lines.append(f"{name}_count{_labels(**base)} {hist.count}")
+
+
+# Process-wide instance used by the API and the instrumented modules
+metrics = Metrics()
+span = metrics.span
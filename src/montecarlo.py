@@ -0,0 +1,147 @@
+"""
+DRDO Air Defence ML Project
+Monte Carlo uncertainty bands for the war models (2 & 3).
+
+Each sample perturbs both sides' force-summary features by independent
+uniform relative noise, and all samples are scored as NumPy batches.
+Samples are drawn in fixed-size chunks, each from its own child of the
+request seed, so a given (seed, samples, noise) gives the same bands
+whether the chunks run in-process or spread over a process pool.
+"""
+
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import threading
+
+import numpy as np
+
+from .war import SIDE_INDEX, score_sides
+
+# Side features perturbed per sample; counts stay whole, modern_pct <= 100
+NOISY_FEATURES = [
+    "avg_threat_level", "avg_tech_gen", "modern_pct", "avg_stealth", "avg_ew",
+    "fighter_count", "sam_count", "uav_count",
+]
+COUNT_FEATURES = ["fighter_count", "sam_count", "uav_count"]
+
+# Samples per chunk (one task on the pool)
+CHUNK_SAMPLES = 10000
+DEFAULT_PERCENTILES = (5, 25, 50, 75, 95)
+
+
+def sample_chunks(samples: int, seed: int) -> list:
+    """[(size, SeedSequence)] covering samples, independent of worker count."""
+    sizes = [CHUNK_SAMPLES] * (samples // CHUNK_SAMPLES)
+    if samples % CHUNK_SAMPLES:
+        sizes.append(samples % CHUNK_SAMPLES)
+    return list(zip(sizes, np.random.SeedSequence(seed).spawn(len(sizes))))
+
+
+def perturb(base: np.ndarray, size: int, noise: float, rng: np.random.Generator) -> np.ndarray:
+    """size copies of one side-feature row with NOISY_FEATURES scaled by U(1-noise, 1+noise)."""
+    rows = np.repeat(base[np.newaxis, :].astype(np.float64), size, axis=0)
+    cols = [SIDE_INDEX[f] for f in NOISY_FEATURES]
+    rows[:, cols] *= rng.uniform(1 - noise, 1 + noise, size=(size, len(cols)))
+    counts = [SIDE_INDEX[f] for f in COUNT_FEATURES]
+    rows[:, counts] = np.round(rows[:, counts])
+    rows[:, SIDE_INDEX["modern_pct"]] = np.minimum(rows[:, SIDE_INDEX["modern_pct"]], 100)
+    return rows
+
+
+def score_chunk(att: np.ndarray, dfn: np.ndarray, size: int, noise: float, seed_seq,
+                scaler, outcome_model, win_model) -> dict:
+    """Score one chunk of perturbed attacker/defender rows; returns the per-sample arrays."""
+    rng = np.random.default_rng(seed_seq)
+    scored = score_sides(perturb(att, size, noise, rng), perturb(dfn, size, noise, rng),
+                         scaler, outcome_model, win_model)
+    return {k: scored[k] for k in ("outcome_idx", "win_prob", "att_loss", "dfn_loss", "duration")}
+
+
+def score_chunks(att, dfn, chunks: list, noise: float, scaler, outcome_model, win_model) -> list:
+    """All chunks in this process, one after another."""
+    return [score_chunk(att, dfn, size, noise, seed_seq, scaler, outcome_model, win_model)
+            for size, seed_seq in chunks]
+
+
+def summarise(parts: list, classes: list, percentiles) -> dict:
+    """Mean, std and percentiles per figure, plus how often each outcome was predicted."""
+    merged = {k: np.concatenate([p[k] for p in parts]) for k in parts[0]}
+
+    def bands(values: np.ndarray, ndigits: int) -> dict:
+        qs = np.percentile(values, percentiles)
+        return {
+            "mean": round(float(values.mean()), ndigits),
+            "std": round(float(values.std()), ndigits),
+            **{f"p{p:g}": round(float(q), ndigits) for p, q in zip(percentiles, qs)},
+        }
+
+    counts = np.bincount(merged["outcome_idx"], minlength=len(classes))
+    return {
+        "attacker_win_probability": bands(merged["win_prob"], 3),
+        "estimated_attacker_loss_pct": bands(merged["att_loss"], 1),
+        "estimated_defender_loss_pct": bands(merged["dfn_loss"], 1),
+        "estimated_duration_days": bands(merged["duration"].astype(np.float64), 1),
+        "outcome_frequencies": {c: round(int(n) / len(merged["outcome_idx"]), 4) for c, n in zip(classes, counts)},
+    }
+
+
+# Process pool: the workers get the war scaler and models once, at start
+_worker_models = None
+
+
+def _init_worker(scaler, outcome_model, win_model):
+    global _worker_models
+    _worker_models = (scaler, outcome_model, win_model)
+
+
+def _score_in_worker(att, dfn, size, noise, seed_seq) -> dict:
+    return score_chunk(att, dfn, size, noise, seed_seq, *_worker_models)
+
+
+class SamplePool:
+    """
+    Process pool for large sample counts, bound to one snapshot version:
+    the first use after a swap replaces the pool, so workers never score
+    with models from an older version. A replaced pool still finishes the
+    chunks already submitted to it before its workers exit.
+    """
+
+    def __init__(self, processes: int):
+        self.processes = processes
+        self._executor = None
+        self._version = None
+        self._lock = threading.Lock()
+
+    def executor_for(self, s) -> ProcessPoolExecutor:
+        """The pool for snapshot s (loads its war models; may raise ModelUnavailableError)."""
+        with self._lock:
+            if self._executor is None or self._version != s.version:
+                models = (s.war_scaler, s.predictor("model2"), s.predictor("model3"))
+                self.shutdown()
+                self._executor = ProcessPoolExecutor(
+                    self.processes,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker, initargs=models,
+                )
+                self._version = s.version
+            return self._executor
+
+    async def run(self, s, att: np.ndarray, dfn: np.ndarray, chunks: list, noise: float) -> list:
+        """score_chunks() with the chunks spread over the pool's workers."""
+        executor = await asyncio.to_thread(self.executor_for, s)
+        loop = asyncio.get_running_loop()
+        return await asyncio.gather(*(
+            loop.run_in_executor(executor, _score_in_worker, att, dfn, size, noise, seed_seq)
+            for size, seed_seq in chunks
+        ))
+
+    def shutdown(self):
+        if self._executor is not None:
+            # No cancel_futures: requests already waiting on this pool complete
+            self._executor.shutdown(wait=False)
+            self._executor = None
+            self._version = None
+
+    def status(self) -> dict:
+        return {"processes": self.processes, "running": self._executor is not None, "version": self._version}
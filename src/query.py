@@ -0,0 +1,124 @@
+"""
+DRDO Air Defence ML Project
+Multi-attribute filter index for the systems catalogue.
+"""
+
+import numpy as np
+import pandas as pd
+
+# When the most selective filter is a range keeping at least 1/SCAN_FRACTION
+# of the rows, select() compares whole columns instead of sorting candidates
+SCAN_FRACTION = 16
+
+
+class QueryIndex:
+    """
+    Equality filters on categorical columns and range filters on numeric
+    columns, answered as sorted row positions without scanning the frame.
+
+    - per category code, the sorted row positions holding it
+    - per numeric column, the argsort order and the sorted values, so a
+      range is two binary searches (NaN sorts last and never matches)
+
+    The most selective filter supplies the candidate positions and every
+    other filter is checked on those rows only (unless that would mean
+    sorting a wide range; see SCAN_FRACTION). Nothing is materialised until the
+    caller takes the positions. Rebuild whenever the frame changes.
+    """
+
+    def __init__(self, df: pd.DataFrame, categorical: list, numeric: list):
+        self.n_rows = len(df)
+
+        self._codes = {}       # column -> category code per row
+        self._categories = {}  # column -> lowercase categories
+        self._postings = {}    # column -> [sorted positions per code]
+        for col in categorical:
+            series = df[col]
+            if not isinstance(series.dtype, pd.CategoricalDtype):
+                series = series.astype("category")
+            codes = series.cat.codes.to_numpy()
+            order = np.argsort(codes, kind="stable")
+            bounds = np.searchsorted(codes[order], np.arange(len(series.cat.categories) + 1))
+            self._codes[col] = codes
+            self._categories[col] = series.cat.categories.str.lower()
+            self._postings[col] = [order[a:b] for a, b in zip(bounds, bounds[1:])]
+
+        self._values = {}      # column -> values in row order
+        self._order = {}       # column -> positions sorting the column
+        self._sorted = {}      # column -> sorted values
+        self._valid = {}       # column -> number of non-NaN values
+        for col in numeric:
+            values = df[col].to_numpy()
+            order = np.argsort(values, kind="stable")
+            self._values[col] = values
+            self._order[col] = order
+            self._sorted[col] = values[order]
+            self._valid[col] = len(values) - int(np.count_nonzero(values != values))
+
+    def _equals(self, col: str, value: str) -> tuple:
+        """(match count, positions(), check(rows), is_range) for col == value, case-insensitive."""
+        hits = np.flatnonzero(self._categories[col] == value.lower())
+        lists = [self._postings[col][h] for h in hits]
+
+        def positions():
+            return lists[0] if len(lists) == 1 else np.sort(np.concatenate(lists or [np.empty(0, np.intp)]))
+
+        def check(rows):
+            return np.isin(self._codes[col][rows], hits)
+
+        return sum(len(p) for p in lists), positions, check, False
+
+    def _range(self, col: str, lo, hi) -> tuple:
+        """(match count, positions(), check(rows), is_range) for lo <= col <= hi (None = open end)."""
+        sorted_values = self._sorted[col]
+        a = 0 if lo is None else int(np.searchsorted(sorted_values, lo, side="left"))
+        # NaNs sort last; an open upper end stops before them
+        b = self._valid[col] if hi is None else int(np.searchsorted(sorted_values, hi, side="right"))
+        b = max(a, b)
+        if lo != lo or hi != hi:
+            a = b = 0  # a NaN bound matches nothing, as with >= / <= on the column
+
+        def positions():
+            return np.sort(self._order[col][a:b])
+
+        def check(rows):
+            values = self._values[col][rows]
+            keep = values == values  # not NaN
+            if lo is not None:
+                keep &= values >= lo
+            if hi is not None:
+                keep &= values <= hi
+            return keep
+
+        return b - a, positions, check, True
+
+    def select(self, equals: dict = None, ranges: dict = None) -> np.ndarray:
+        """
+        Sorted positions of the rows matching every filter:
+        equals {column: value} (empty values ignored) and
+        ranges {column: (lo, hi)} (inclusive; None leaves that end open).
+        """
+        filters = [self._equals(col, value) for col, value in (equals or {}).items() if value]
+        filters += [
+            self._range(col, lo, hi)
+            for col, (lo, hi) in (ranges or {}).items()
+            if lo is not None or hi is not None
+        ]
+        if not filters:
+            return np.arange(self.n_rows)
+
+        filters.sort(key=lambda f: f[0])
+        count, positions, _, is_range = filters[0]
+        if is_range and count * SCAN_FRACTION >= self.n_rows:
+            # Nothing selective: comparing whole columns beats sorting rows
+            keep = np.ones(self.n_rows, dtype=bool)
+            for _, _, check, _ in filters:
+                keep &= check(slice(None))
+            return np.flatnonzero(keep)
+
+        positions = positions()
+        for _, _, check, _ in filters[1:]:
+            if not len(positions):
+                break
+            positions = positions[check(positions)]
+        return positions
@@ -0,0 +1,550 @@
+"""
+DRDO Air Defence ML Project
+Versioned registry of the loaded data, models and derived indexes.
+
+Everything a request needs lives on one immutable Snapshot. Routes grab
+registry.current() once and use only that snapshot, so a reload can build
+and validate a new snapshot in the background and swap it in atomically
+while in-flight requests finish on the old one.
+"""
+
+from datetime import datetime, timezone
+import hashlib
+import json
+import os
+import threading
+import time
+
+import joblib
+
+from .classify import NUMERIC_FEATURES, SystemPredictionCache, build_features
+from .columnar import StoreError, load as load_columnar
+from .forest import FlatForest, compile_forest, compile_scaler
+from .indexes import EMPTY_FORCE_SUMMARY, build_force_summaries, build_name_index, build_type_partitions
+from .query import QueryIndex
+from .scenarios import ScenarioIndex
+from .schema import CATEGORICAL_COLUMNS, DATA_FILES, REQUIRED_COLUMNS, frame_memory, read_csv_frames
+from .search import AutocompleteIndex
+from .similar import SimilarityIndex
+from .serialize import df_to_records
+from .shared_store import forest_path, load_store
+from .war import OUTCOME_DESCRIPTIONS, SIDE_FEATURES, ZONE_MAP, WarOutcomeMatrix, build_side_features
+
+# Large tree ensembles: unpickled on first use (see LazyModel)
+LAZY_MODELS = ("model1", "model2", "model3")
+
+MODEL_FILES = {
+    "model1":       "model1_classifier.pkl",
+    "model2":       "model2_war_outcome.pkl",
+    "model3":       "model3_win_prob.pkl",
+    "scaler_m1":    "scaler_m1.pkl",
+    "scaler_m2":    "scaler_m2.pkl",
+    "sys_type_enc": "system_type_encoder.pkl",
+}
+METADATA_FILE = "model_metadata.json"
+
+COUNTRY_NAME_COLS = ["country", "iso_code", "risk_zone", "flag_url"]
+SYSTEM_NAME_COLS = ["system_id", "system_name", "country", "system_type", "classification", "threat_level"]
+# Numeric system columns /api/systems can range-filter on
+SYSTEM_RANGE_COLS = ["threat_level", "range_km", "max_speed_kmph", "year_inducted"]
+
+
+def artifact_fingerprint(data_dir: str, model_dir: str) -> str:
+    """Cheap identity of everything in data/ and models/ (name, size, mtime)."""
+    parts = []
+    for d in (data_dir, model_dir):
+        for name in sorted(os.listdir(d)):
+            st = os.stat(os.path.join(d, name))
+            parts.append(f"{name}:{st.st_size}:{st.st_mtime_ns}")
+    return hashlib.sha1("|".join(parts).encode()).hexdigest()[:16]
+
+
+class ModelUnavailableError(RuntimeError):
+    """A lazily loaded model could not be loaded or failed validation."""
+
+
+class LazyModel:
+    """
+    One model pickle, unpickled on first get() and then kept.
+
+    Loading is thread-safe and happens once; a failed load is recorded in
+    state/error and retried on the next get(). mmap_mode is passed to
+    joblib; sklearn still copies the tree nodes when it unpickles them.
+    With compile=True the model is also converted to a FlatForest
+    (src/forest.py); predictor() returns it when it matched sklearn.
+
+    shared_dir names a FlatForest saved by the launcher (already checked
+    and validated there). predictor() then maps it read-only instead of
+    unpickling the model, so workers share one copy of the node arrays.
+    """
+
+    def __init__(self, path: str, mmap_mode: str = None, check=None, compile: bool = False,
+                 shared_dir: str = None):
+        self.path = path
+        self.mmap_mode = mmap_mode
+        self.check = check
+        self.compile = compile
+        self.shared_dir = shared_dir
+        self.flat = None
+        self.error = None
+        self.load_seconds = None
+        self._value = None
+        self._loading = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self._value is not None or self.flat is not None:
+            return "ready"
+        if self._loading:
+            return "loading"
+        return "error" if self.error else "not_loaded"
+
+    def get(self):
+        if self._value is not None:
+            return self._value
+        with self._lock:
+            if self._value is None:
+                self._loading = True
+                started = time.perf_counter()
+                try:
+                    model = joblib.load(self.path, mmap_mode=self.mmap_mode)
+                    if self.check:
+                        self.check(model)
+                    if self.compile and self.flat is None:
+                        self.flat = compile_forest(model)
+                except Exception as e:
+                    self.error = f"{type(e).__name__}: {e}"
+                    raise ModelUnavailableError(f"{os.path.basename(self.path)}: {self.error}") from e
+                finally:
+                    self._loading = False
+                self.load_seconds = round(time.perf_counter() - started, 3)
+                self.error = None
+                self._value = model
+            return self._value
+
+    def predictor(self):
+        """The fastest validated implementation: FlatForest or the model itself."""
+        if self.flat is None and self.shared_dir:
+            self._load_shared()
+        if self.flat is not None:
+            return self.flat
+        model = self.get()
+        return self.flat if self.flat is not None else model
+
+    def _load_shared(self):
+        with self._lock:
+            if self.flat is not None or not self.shared_dir:
+                return
+            started = time.perf_counter()
+            try:
+                self.flat = FlatForest.load(self.shared_dir, self.path)
+            except (OSError, ValueError, KeyError):
+                self.shared_dir = None  # unpickle and compile instead
+                return
+            self.load_seconds = round(time.perf_counter() - started, 3)
+            self.error = None
+
+    @property
+    def backend(self):
+        if self.flat is not None:
+            return "flat"
+        if self._value is None:
+            return None
+        return "sklearn"
+
+    def status(self) -> dict:
+        return {
+            "state": self.state, "backend": self.backend, "shared": self.shared_dir is not None,
+            "load_seconds": self.load_seconds, "error": self.error,
+        }
+
+
+def check_outcome_model(model):
+    """model2 must only predict outcomes the API can describe."""
+    outcomes = set(model.classes_) - set(OUTCOME_DESCRIPTIONS)
+    if outcomes:
+        raise ValueError(f"{MODEL_FILES['model2']} predicts unknown outcomes {sorted(outcomes)}")
+
+
+class Snapshot:
+    """
+    One consistent set of frames, models and derived indexes.
+    Treat it as read-only once built; a reload makes a new one.
+
+    model1/2/3 and the caches scored from them are built on first use;
+    warm() forces all of it up front.
+    """
+
+    def __init__(self, frames: dict, models: dict, model_meta: dict, version: str, tree_backend: str = "flat"):
+        self.version = version
+        self.loaded_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        self.frames_source = "csv"
+        self.frames_fallback = None  # why the columnar store was not used
+
+        self.countries_df = frames["countries"]
+        self.systems_df = frames["systems"]
+        self.scenarios_df = frames["scenarios"]
+
+        self.lazy_models = {name: models[name] for name in LAZY_MODELS}
+        self.scaler_m1 = models["scaler_m1"]
+        self.scaler_m2 = models["scaler_m2"]
+        self.sys_type_enc = models["sys_type_enc"]
+        # Validation-free scalers for the flat backend (same float ops)
+        fast = tree_backend == "flat"
+        self.classify_scaler = (fast and compile_scaler(self.scaler_m1)) or self.scaler_m1
+        self.war_scaler = (fast and compile_scaler(self.scaler_m2)) or self.scaler_m2
+
+        self.model_meta = model_meta
+        self.model1_algo = model_meta.get("model1", {}).get("algorithm", "Classifier")
+        self.model2_algo = model_meta.get("model2", {}).get("algorithm", "Classifier")
+        self.model1_acc = model_meta.get("model1", {}).get("accuracy", model_meta.get("model1_accuracy"))
+        self.model2_acc = model_meta.get("model2", {}).get("accuracy", model_meta.get("model2_accuracy"))
+
+        self.war_matrix = None
+        self._war_matrix_lock = threading.Lock()
+        self._system_predictions = None
+        self._predictions_lock = threading.Lock()
+        self._build_indexes()
+
+    @property
+    def model1(self):
+        return self.lazy_models["model1"].get()
+
+    @property
+    def model2(self):
+        return self.lazy_models["model2"].get()
+
+    @property
+    def model3(self):
+        return self.lazy_models["model3"].get()
+
+    def predictor(self, name: str):
+        """model1/2/3 for scoring: the flat backend when enabled and validated."""
+        return self.lazy_models[name].predictor()
+
+    def model_status(self) -> dict:
+        return {name: lazy.status() for name, lazy in self.lazy_models.items()}
+
+    def memory_report(self) -> dict:
+        """Per-frame memory footprint (see schema.frame_memory())."""
+        return {
+            "countries": frame_memory(self.countries_df),
+            "systems":   frame_memory(self.systems_df),
+            "scenarios": frame_memory(self.scenarios_df),
+        }
+
+    def _build_indexes(self):
+        """Every derived lookup table, computed once from this snapshot's frames."""
+        self.force_summaries = build_force_summaries(self.systems_df)
+        self.type_partitions = build_type_partitions(self.systems_df)
+        self.country_name_index = build_name_index(self.countries_df["country"])
+        self.system_name_index = build_name_index(self.systems_df["system_name"])
+        self.system_id_index = build_name_index(self.systems_df["system_id"].astype(str))
+        self.system_query = QueryIndex(self.systems_df, CATEGORICAL_COLUMNS["systems"], SYSTEM_RANGE_COLS)
+        self.country_search = AutocompleteIndex(
+            self.countries_df["country"].tolist(),
+            df_to_records(self.countries_df[COUNTRY_NAME_COLS]),
+        )
+        self.system_search = AutocompleteIndex(
+            self.systems_df["system_name"].tolist(),
+            df_to_records(self.systems_df[SYSTEM_NAME_COLS]),
+            groups=self.systems_df["country"].str.lower().tolist(),
+        )
+        self.war_side_features = build_side_features(self.countries_df, self.force_summaries, EMPTY_FORCE_SUMMARY)
+        self.scenario_index = ScenarioIndex(self.scenarios_df)
+        # Model 1's scaled feature space; needs only the scaler and encoder, not model 1
+        self.similarity_index = SimilarityIndex(
+            self.classify_scaler.transform(build_features(self.systems_df, self.sys_type_enc))
+        )
+
+    @property
+    def system_predictions_ready(self) -> bool:
+        return self._system_predictions is not None
+
+    @property
+    def system_predictions(self) -> SystemPredictionCache:
+        """Model 1 over the whole catalogue, scored on first use."""
+        if self._system_predictions is None:
+            with self._predictions_lock:
+                if self._system_predictions is None:
+                    self._system_predictions = SystemPredictionCache(
+                        self.systems_df, self.sys_type_enc, self.classify_scaler, self.predictor("model1")
+                    )
+        return self._system_predictions
+
+    def build_war_matrix(self) -> WarOutcomeMatrix:
+        """Score every attacker x defender pair once; later calls are free."""
+        with self._war_matrix_lock:
+            if self.war_matrix is None:
+                self.war_matrix = WarOutcomeMatrix(
+                    self.war_side_features, self.war_scaler,
+                    self.predictor("model2"), self.predictor("model3"), self.version,
+                )
+            return self.war_matrix
+
+    def warm(self):
+        """
+        Load every model and build the model-backed caches now. Each model
+        is attempted even if another fails; the first failure is re-raised.
+        """
+        errors = []
+        for lazy in self.lazy_models.values():
+            try:
+                lazy.predictor()
+            except ModelUnavailableError as e:
+                errors.append(e)
+        if self.lazy_models["model1"].state == "ready":
+            self.system_predictions
+        if errors:
+            raise errors[0]
+        self.build_war_matrix()
+
+
+def validate(frames: dict, models: dict, require_models: bool = True):
+    """Reject artifacts the API cannot serve. Raises ValueError."""
+    for name, cols in REQUIRED_COLUMNS.items():
+        df = frames[name]
+        missing = [c for c in cols if c not in df.columns]
+        if missing:
+            raise ValueError(f"{DATA_FILES[name]} is missing columns {missing}")
+        if df.empty:
+            raise ValueError(f"{DATA_FILES[name]} has no rows")
+
+    zones = set(frames["countries"]["risk_zone"]) - set(ZONE_MAP)
+    if zones:
+        raise ValueError(f"Unknown risk_zone values {sorted(zones)}")
+    types = set(frames["systems"]["system_type"]) - set(models["sys_type_enc"].classes_)
+    if types:
+        raise ValueError(f"system_type values unknown to the encoder: {sorted(types)}")
+
+    expected = {
+        "scaler_m1": len(NUMERIC_FEATURES) + 1,
+        "scaler_m2": 2 * len(SIDE_FEATURES) + 4,
+    }
+    for name, n in expected.items():
+        got = getattr(models[name], "n_features_in_", n)
+        if got != n:
+            raise ValueError(f"{MODEL_FILES[name]} expects {got} features, API builds {n}")
+    for name in LAZY_MODELS if require_models else ():
+        if not os.path.exists(models[name].path):
+            raise ValueError(f"{MODEL_FILES[name]} not found")
+
+
+def read_frames(data_dir: str, store_dir: str = None, version: str = None, columnar_dir: str = None):
+    """
+    (frames, source, fallback_reason). Tries the shared store at store_dir
+    (built for this version), then the columnar store at columnar_dir (built
+    from the current CSVs), then parses the CSVs. All three give the same
+    dtypes (see schema.apply_schema()).
+    """
+    if store_dir:
+        frames = load_store(store_dir, version)
+        if frames is not None:
+            return frames, "shared_store", None
+    reason = None
+    if columnar_dir and os.path.isdir(columnar_dir):
+        try:
+            return load_columnar(data_dir, columnar_dir), "columnar", None
+        except StoreError as e:
+            reason = str(e)
+    return read_csv_frames(data_dir), "csv", reason
+
+
+def load_snapshot(data_dir: str, model_dir: str, mmap_mode: str = None, require_models: bool = True,
+                  store_dir: str = None, tree_backend: str = "flat", columnar_dir: str = None) -> Snapshot:
+    """
+    Read, validate and index one set of artifacts. The small scalers and
+    encoder load now; model1/2/3 are LazyModel handles. require_models=False
+    lets the API start (and report per-model readiness) with a model missing.
+    Frames come from the first usable of the shared store, the columnar
+    store and the CSVs (see read_frames()); with the shared store in use,
+    the forests saved in it back the flat backend.
+    """
+    version = artifact_fingerprint(data_dir, model_dir)
+    frames, source, fallback = read_frames(data_dir, store_dir, version, columnar_dir)
+    compile = tree_backend == "flat"
+    models = {}
+    for name, f in MODEL_FILES.items():
+        path = os.path.join(model_dir, f)
+        if name in LAZY_MODELS:
+            check = check_outcome_model if name == "model2" else None
+            shared = forest_path(store_dir, name) if compile and source == "shared_store" else None
+            if shared and not os.path.isdir(shared):
+                shared = None
+            models[name] = LazyModel(path, mmap_mode=mmap_mode, check=check, compile=compile, shared_dir=shared)
+        else:
+            models[name] = joblib.load(path)
+    with open(os.path.join(model_dir, METADATA_FILE)) as fh:
+        model_meta = json.load(fh)
+    validate(frames, models, require_models)
+    snapshot = Snapshot(frames, models, model_meta, version, tree_backend)
+    snapshot.frames_source = source
+    snapshot.frames_fallback = fallback
+    return snapshot
+
+
+class Registry:
+    """
+    Holds the live Snapshot and swaps in new ones.
+
+    current() is a plain attribute read, so it never blocks on a reload.
+    Reloads are serialised; a failed reload keeps the old snapshot and
+    records the error in status().
+    """
+
+    def __init__(self, data_dir: str, model_dir: str, mmap_mode: str = None, store_dir: str = None,
+                 tree_backend: str = "flat", columnar_dir: str = None):
+        self.data_dir = data_dir
+        self.model_dir = model_dir
+        self.mmap_mode = mmap_mode
+        self.store_dir = store_dir
+        self.tree_backend = tree_backend
+        self.columnar_dir = columnar_dir
+        self._snapshot = None
+        self._reload_lock = threading.Lock()
+        self._listeners = []
+        self._watcher = None
+        self.watch_interval = None
+        self.watch_failed_version = None  # fingerprint the watcher gave up on
+        self.reloading = False
+        self.reload_count = 0
+        self.last_error = None
+        self.last_attempt_at = None
+
+    def current(self) -> Snapshot:
+        return self._snapshot
+
+    def on_swap(self, callback):
+        """Call callback(new_snapshot) after every successful swap."""
+        self._listeners.append(callback)
+
+    def _swap(self, snapshot: Snapshot):
+        self._snapshot = snapshot
+        for callback in self._listeners:
+            callback(snapshot)
+
+    def load(self) -> Snapshot:
+        """
+        Initial synchronous load; data errors propagate so a bad deploy fails
+        fast. Models are not unpickled here (see Snapshot.warm()).
+        """
+        self._swap(load_snapshot(
+            self.data_dir, self.model_dir, self.mmap_mode, require_models=False,
+            store_dir=self.store_dir, tree_backend=self.tree_backend, columnar_dir=self.columnar_dir,
+        ))
+        return self._snapshot
+
+    def reload(self, force: bool = False) -> bool:
+        """
+        Build a new snapshot and swap it in. Skipped (returns False) when the
+        files are unchanged, unless force is set. Raises on invalid artifacts.
+        """
+        with self._reload_lock:
+            return self._reload_locked(force)
+
+    def _reload_locked(self, force: bool) -> bool:
+        """reload() for a caller already holding _reload_lock."""
+        self.reloading = True
+        self.last_attempt_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        try:
+            current = self._snapshot
+            if not force and current is not None and \
+                    artifact_fingerprint(self.data_dir, self.model_dir) == current.version:
+                return False
+            snapshot = load_snapshot(
+                self.data_dir, self.model_dir, self.mmap_mode,
+                store_dir=self.store_dir, tree_backend=self.tree_backend, columnar_dir=self.columnar_dir,
+            )
+            # Warm before the swap so the new version serves at full speed
+            # and a broken model pickle never goes live
+            snapshot.warm()
+            self._swap(snapshot)
+            self.reload_count += 1
+            self.last_error = None
+            return True
+        except Exception as e:
+            self.last_error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            self.reloading = False
+
+    def reload_in_background(self, force: bool = False) -> bool:
+        """
+        Start a reload thread; False if a reload is already running. The
+        caller takes the reload lock (without waiting) and the thread
+        releases it, so concurrent calls cannot both start one.
+        """
+        if not self._reload_lock.acquire(blocking=False):
+            return False
+        self.reloading = True
+
+        def run():
+            try:
+                self._reload_locked(force)
+            except Exception:
+                pass  # recorded in last_error; the old snapshot stays live
+            finally:
+                self._reload_lock.release()
+
+        try:
+            threading.Thread(target=run, name="registry-reload", daemon=True).start()
+        except Exception:
+            self.reloading = False
+            self._reload_lock.release()
+            raise
+        return True
+
+    def watch(self, interval: float):
+        """
+        Poll data/ and models/ every interval seconds and reload when the
+        fingerprint changes and has been stable for one full interval
+        (so half-copied files are not picked up). A fingerprint that failed
+        to load is not retried until the files change again.
+        """
+        if self._watcher is not None:
+            return
+        self.watch_interval = interval
+
+        def run():
+            pending = None
+            while True:
+                time.sleep(interval)
+                try:
+                    fp = artifact_fingerprint(self.data_dir, self.model_dir)
+                except OSError:
+                    continue
+                if fp == self._snapshot.version or fp == self.watch_failed_version:
+                    pending = None
+                elif fp == pending:
+                    try:
+                        self.reload()
+                        self.watch_failed_version = None
+                    except Exception:
+                        self.watch_failed_version = fp  # error recorded in last_error
+                    pending = None
+                else:
+                    pending = fp
+
+        self._watcher = threading.Thread(target=run, name="registry-watch", daemon=True)
+        self._watcher.start()
+
+    def status(self) -> dict:
+        s = self._snapshot
+        return {
+            "version": s.version if s else None,
+            "loaded_at": s.loaded_at if s else None,
+            "frames_source": s.frames_source if s else None,
+            "frames_fallback": s.frames_fallback if s else None,
+            "frames_memory": s.memory_report() if s else None,
+            "tree_backend": self.tree_backend,
+            "pid": os.getpid(),
+            "models": s.model_status() if s else None,
+            "war_matrix_ready": bool(s and s.war_matrix is not None),
+            "reloading": self.reloading,
+            "reload_count": self.reload_count,
+            "last_attempt_at": self.last_attempt_at,
+            "last_error": self.last_error,
+            "watch_interval_s": self.watch_interval,
+            "watch_failed_version": self.watch_failed_version,
+        }
@@ -0,0 +1,71 @@
+"""
+DRDO Air Defence ML Project
+Precomputed statistics over the simulated conflict scenarios.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+class ScenarioIndex:
+    """
+    Outcome tallies per country and role, per attacker/defender pair, and
+    attacker win-probability sums, from one groupby over scenarios_df.
+    Rebuild whenever scenarios_df changes.
+    """
+
+    def __init__(self, scenarios: pd.DataFrame):
+        groups = scenarios.groupby(["attacker", "defender", "outcome"], observed=True, sort=False).indices
+        self.outcomes = sorted({outcome for _, _, outcome in groups})
+
+        self.head_to_head = {}   # (attacker, defender) -> {outcome: n}
+        self.as_attacker = {}    # country -> {outcome: n}
+        self.as_defender = {}    # country -> {outcome: n}
+        self._self_play = {}     # country -> {outcome: n} for attacker == defender rows
+        attack_rows = {}         # attacker -> [row positions]
+        for (att, dfn, outcome), positions in groups.items():
+            n = len(positions)
+            _add(self.head_to_head.setdefault((att, dfn), {}), outcome, n)
+            _add(self.as_attacker.setdefault(att, {}), outcome, n)
+            _add(self.as_defender.setdefault(dfn, {}), outcome, n)
+            if att == dfn:
+                _add(self._self_play.setdefault(att, {}), outcome, n)
+            attack_rows.setdefault(att, []).append(positions)
+
+        # Summed over each attacker's rows in file order, NaNs skipped, so the
+        # mean matches Series.mean() on the filtered rows exactly
+        probs = scenarios["attacker_win_probability"].to_numpy(dtype=np.float64)
+        self.win_prob_sum = {}
+        self.win_prob_count = {}
+        for att, parts in attack_rows.items():
+            values = probs[np.sort(np.concatenate(parts))]
+            valid = ~np.isnan(values)
+            self.win_prob_sum[att] = float(np.where(valid, values, 0.0).sum())
+            self.win_prob_count[att] = int(valid.sum())
+
+    def count(self, country: str, role: str, outcome: str) -> int:
+        """Scenarios with country as role ("attacker" or "defender") ending in outcome."""
+        tallies = self.as_attacker if role == "attacker" else self.as_defender
+        return tallies.get(country, {}).get(outcome, 0)
+
+    def involving(self, country: str, outcome: str) -> int:
+        """Scenarios with country on either side ending in outcome (each row once)."""
+        return (
+            self.count(country, "attacker", outcome)
+            + self.count(country, "defender", outcome)
+            - self._self_play.get(country, {}).get(outcome, 0)
+        )
+
+    def avg_win_prob_as_attacker(self, country: str) -> float:
+        """Mean attacker_win_probability over country's attacks (nan if none)."""
+        count = self.win_prob_count.get(country, 0)
+        return self.win_prob_sum[country] / count if count else float("nan")
+
+    def pair(self, attacker: str, defender: str) -> dict:
+        """Outcome counts for attacker vs defender, zero-filled over every outcome."""
+        tallies = self.head_to_head.get((attacker, defender), {})
+        return {outcome: tallies.get(outcome, 0) for outcome in self.outcomes}
+
+
+def _add(tallies: dict, key, n: int):
+    tallies[key] = tallies.get(key, 0) + n
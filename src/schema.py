@@ -0,0 +1,103 @@
+"""
+DRDO Air Defence ML Project
+The data files, the columns the API needs from them, and the in-memory
+dtypes every loader (CSV, columnar store, shared store) produces.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from .classify import NUMERIC_FEATURES
+
+DATA_FILES = {
+    "countries": "countries_profiles.csv",
+    "systems":   "air_systems_enhanced.csv",
+    "scenarios": "conflict_scenarios.csv",
+}
+
+REQUIRED_COLUMNS = {
+    "countries": [
+        "country", "iso_code", "risk_zone", "risk_score", "flag_url",
+        "military_budget_billion_usd", "combat_aircraft_count", "nuclear_capable",
+    ],
+    "systems": [
+        "system_id", "system_name", "country", "system_type", "classification",
+        "combat_proven", *NUMERIC_FEATURES,
+    ],
+    "scenarios": ["attacker", "defender", "outcome", "attacker_win_probability"],
+}
+
+# Low-cardinality text held as pandas categoricals (categories sorted);
+# the codes are what filters compare (see category_mask()) and
+# dtype.categories is the dictionary that decodes them. Group with
+# observed=True and count via value_counts_dict() so unused categories
+# never show up as zero rows.
+CATEGORICAL_COLUMNS = {
+    "countries": ["risk_zone"],
+    "systems":   ["country", "system_type", "classification"],
+    "scenarios": ["attacker", "defender", "outcome"],
+}
+
+
+def apply_schema(frames: dict) -> dict:
+    """Convert freshly parsed frames (in place) to the API's dtypes."""
+    for name, df in frames.items():
+        for col in CATEGORICAL_COLUMNS.get(name, ()):
+            if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+                df[col] = df[col].astype("category")
+        compact_numeric(df)
+    return frames
+
+
+def compact_numeric(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Narrow numeric columns in place: integers to the smallest type holding
+    their range, float64 to float32 only where every value survives the
+    round trip exactly. Values read back unchanged, but float32 arithmetic
+    rounds differently, so aggregate float columns as float64.
+    """
+    for col in df.columns:
+        kind = df[col].dtype.kind
+        if kind in "iu":
+            df[col] = pd.to_numeric(df[col], downcast="integer" if kind == "i" else "unsigned")
+        elif df[col].dtype == np.float64:
+            values = df[col].to_numpy()
+            narrow = values.astype(np.float32)
+            if np.array_equal(narrow.astype(np.float64), values, equal_nan=True):
+                df[col] = narrow
+    return df
+
+
+def category_mask(series: pd.Series, value: str) -> np.ndarray:
+    """
+    Case-insensitive series == value as a boolean array. For categoricals
+    only the categories are lowered; rows are matched on their integer codes.
+    """
+    if not isinstance(series.dtype, pd.CategoricalDtype):
+        return (series.str.lower() == value.lower()).to_numpy()
+    hits = np.flatnonzero(series.cat.categories.str.lower() == value.lower())
+    return np.isin(series.cat.codes.to_numpy(), hits)
+
+
+def frame_memory(df: pd.DataFrame) -> dict:
+    """
+    Bytes held by df (text counted deep). mapped_bytes is the part backed
+    by memory-mapped store files, shared with other processes via the page
+    cache rather than private to this one.
+    """
+    usage = df.memory_usage(deep=True, index=False)
+    dtypes = {}
+    for col in df.columns:
+        dtypes[str(df[col].dtype)] = dtypes.get(str(df[col].dtype), 0) + 1
+    return {
+        "rows": len(df),
+        "bytes": int(usage.sum()),
+        "mapped_bytes": int(sum(usage[c] for c in df.columns if isinstance(df[c].values, np.memmap))),
+        "columns_by_dtype": dtypes,
+    }
+
+
+def read_csv_frames(data_dir: str) -> dict:
+    return apply_schema({name: pd.read_csv(os.path.join(data_dir, f)) for name, f in DATA_FILES.items()})
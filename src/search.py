@@ -0,0 +1,93 @@
+"""
+DRDO Air Defence ML Project
+In-memory autocomplete index for the name dropdowns.
+"""
+
+from bisect import bisect_left, bisect_right
+from typing import Optional
+
+
+class AutocompleteIndex:
+    """
+    Search index over one name column, built once at load time.
+
+    - a sorted array of lowercase names answers prefix queries with bisect
+    - an inverted index of 1-3 character n-grams answers substring queries
+
+    Matches are ranked prefix-first, then alphabetically, and returned as the
+    precomputed records passed in, so a query never touches the DataFrame.
+    """
+    MAX_GRAM = 3
+
+    def __init__(self, names: list, records: list, groups: Optional[list] = None):
+        # rank = position in alphabetical order of the original names
+        order = sorted(range(len(names)), key=lambda i: names[i])
+        self._records = [records[i] for i in order]
+        self._lower = [names[i].lower() for i in order]
+        self._groups = [groups[i] for i in order] if groups is not None else None
+
+        # Sorted prefix array: (lowercase name, rank)
+        self._prefix = sorted((name, rank) for rank, name in enumerate(self._lower))
+        self._prefix_keys = [name for name, _ in self._prefix]
+
+        # n-gram -> set of ranks containing it
+        self._grams = {}
+        for rank, name in enumerate(self._lower):
+            for n in range(1, self.MAX_GRAM + 1):
+                for i in range(len(name) - n + 1):
+                    self._grams.setdefault(name[i:i + n], set()).add(rank)
+
+        # group -> ranks, for the no-query case
+        self._by_group = {}
+        if self._groups is not None:
+            for rank, group in enumerate(self._groups):
+                self._by_group.setdefault(group, []).append(rank)
+
+    def __len__(self):
+        return len(self._records)
+
+    def _prefix_ranks(self, q: str) -> list:
+        lo = bisect_left(self._prefix_keys, q)
+        hi = bisect_right(self._prefix_keys, q + "\uffff")
+        return sorted(rank for _, rank in self._prefix[lo:hi])
+
+    def _substring_ranks(self, q: str) -> set:
+        n = min(len(q), self.MAX_GRAM)
+        grams = {q[i:i + n] for i in range(len(q) - n + 1)}
+        # Intersect the rarest posting lists first
+        postings = sorted((self._grams.get(g, set()) for g in grams), key=len)
+        candidates = set(postings[0])
+        for p in postings[1:]:
+            candidates &= p
+            if not candidates:
+                break
+        if len(q) > self.MAX_GRAM:
+            candidates = {r for r in candidates if q in self._lower[r]}
+        return candidates
+
+    def search(self, q: Optional[str] = None, limit: int = 100, group: Optional[str] = None) -> list:
+        """
+        Ranked records whose name contains q (case-insensitive), at most limit.
+        group optionally restricts results to one group key (lowercase).
+        """
+        group = group.lower() if group else None
+        if group is not None and group not in self._by_group:
+            return []
+
+        if not q:
+            ranks = self._by_group[group] if group is not None else range(len(self._records))
+            return [self._records[r] for r in ranks[:limit]]
+
+        q = q.lower()
+        prefix = self._prefix_ranks(q)
+        seen = set(prefix)
+        rest = sorted(r for r in self._substring_ranks(q) if r not in seen)
+
+        results = []
+        for r in prefix + rest:
+            if group is not None and self._groups[r] != group:
+                continue
+            results.append(self._records[r])
+            if len(results) >= limit:
+                break
+        return results
@@ -0,0 +1,103 @@
+"""
+DRDO Air Defence ML Project
+Fast JSON encoding helpers shared by the routes and the derived indexes.
+"""
+
+from fastapi.responses import JSONResponse
+import pandas as pd
+import numpy as np
+import json
+
+from .metrics import span
+
+
+def _json_default(obj):
+    """Convert the numpy scalars/arrays the encoder meets to native types."""
+    if isinstance(obj, np.integer):
+        return int(obj)
+    if isinstance(obj, np.floating):
+        return float(obj)
+    if isinstance(obj, np.bool_):
+        return bool(obj)
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(content) -> str:
+    """Compact JSON via the C encoder, numpy values converted where they occur."""
+    return json.dumps(
+        content,
+        default=_json_default,
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":"),
+    )
+
+
+# Items per encoder call in dumps_chunked(); one call holds the GIL throughout
+CHUNK_ITEMS = 500
+
+
+def dumps_chunked(content: dict, key: str) -> str:
+    """
+    dumps(content), byte for byte, with the list content[key] encoded
+    CHUNK_ITEMS at a time so other threads (the event loop) get the GIL
+    between encoder calls instead of waiting out one long one.
+    """
+    def value(k, v):
+        if k != key or not v:
+            return dumps(v)
+        return "[" + ",".join(dumps(v[i:i + CHUNK_ITEMS])[1:-1] for i in range(0, len(v), CHUNK_ITEMS)) + "]"
+
+    return "{" + ",".join(dumps(k) + ":" + value(k, v) for k, v in content.items()) + "}"
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response encoded in one pass by the C encoder; numpy values are
+    converted only where they occur. Return it directly from a route so
+    FastAPI skips its own jsonable_encoder walk. chunked names a long list
+    in content to encode in pieces (see dumps_chunked()).
+    """
+    def __init__(self, content, *args, chunked: str = None, **kwargs):
+        self.chunked = chunked
+        super().__init__(content, *args, **kwargs)
+
+    def render(self, content) -> bytes:
+        with span("serialize_json"):
+            if self.chunked:
+                return dumps_chunked(content, self.chunked).encode("utf-8")
+            return dumps(content).encode("utf-8")
+
+
+def iter_ndjson(record_batches):
+    """
+    Newline-delimited JSON: one line per record, one chunk per batch, so a
+    StreamingResponse sends each batch as soon as it is encoded.
+    """
+    for records in record_batches:
+        if records:
+            with span("serialize_ndjson"):
+                chunk = ("".join(dumps(rec) + "\n" for rec in records)).encode("utf-8")
+            yield chunk
+
+
+def df_to_records(df: pd.DataFrame) -> list:
+    """
+    Convert a DataFrame to a JSON-safe list of dicts.
+    Each column is converted to native Python values in one go (NaN -> None)
+    and the rows are zipped together, with no JSON round trip.
+    """
+    with span("df_to_records"):
+        columns = []
+        for name in df.columns:
+            col = df[name]
+            values = col.tolist()
+            if col.dtype.kind not in "iub":
+                missing = col.isna().to_numpy()
+                if missing.any():
+                    values = [None if m else v for v, m in zip(values, missing)]
+            columns.append(values)
+        keys = [str(k) for k in df.columns]
+        return [dict(zip(keys, row)) for row in zip(*columns)]
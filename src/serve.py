@@ -0,0 +1,99 @@
+"""
+DRDO Air Defence ML Project
+Multi-worker launcher.
+
+    python -m src.serve --workers 4 --port 8000
+
+Parses the CSVs once, writes the numeric columns to a shared-memory store
+(src/shared_store.py) and starts uvicorn workers that map that store
+read-only instead of each parsing their own copy. The forests are loaded,
+checked and compiled to flat arrays (src/forest.py) once here too and saved
+in the store, so workers map the node arrays rather than unpickling a
+private copy of each model. A worker still unpickles a model on its first
+batch over FLAT_MAX_ROWS rows, which sklearn scores faster. The store
+belongs to this launcher alone and is removed when it exits.
+
+Each worker gets cpu_count // workers Monte Carlo processes (none when that
+is under 2) unless AIRDEF_MC_PROCESSES is set, so the pools of all workers
+together do not oversubscribe the machine.
+
+A hot reload (/api/admin/reload or AIRDEF_WATCH_INTERVAL) only reaches the
+worker that handles it; the new data is read from the CSVs, so restart the
+launcher to share a new data version again.
+"""
+
+import argparse
+import os
+import shutil
+
+import joblib
+import uvicorn
+
+from .forest import compile_forest
+from .registry import LAZY_MODELS, MODEL_FILES, artifact_fingerprint, check_outcome_model
+from .schema import read_csv_frames
+from .shared_store import build_store, default_store_root, forest_path, store_size
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def share_forests(store: str, model_dir: str) -> list:
+    """
+    Save the validated flat forest of each model into store; returns the
+    names saved. A model that fails to load, fails its check or does not
+    compile is skipped, and workers load it from its pickle as usual.
+    """
+    shared = []
+    for name in LAZY_MODELS:
+        try:
+            model = joblib.load(os.path.join(model_dir, MODEL_FILES[name]))
+            if name == "model2":
+                check_outcome_model(model)
+        except Exception as e:
+            print(f"Not sharing {name}: {type(e).__name__}: {e}")
+            continue
+        flat = compile_forest(model)
+        if flat is None:
+            print(f"Not sharing {name}: no validated flat forest")
+            continue
+        flat.save(forest_path(store, name))
+        shared.append(name)
+    return shared
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the API with several workers sharing one data copy")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--store-root", default=default_store_root(),
+                        help="Where to write the shared store (default: /dev/shm)")
+    parser.add_argument("--no-store", action="store_true",
+                        help="Skip the shared store; every worker parses the CSVs")
+    args = parser.parse_args()
+
+    data_dir = os.environ.setdefault("AIRDEF_DATA_DIR", os.path.join(BASE_DIR, "data"))
+    model_dir = os.environ.setdefault("AIRDEF_MODEL_DIR", os.path.join(BASE_DIR, "models"))
+    mc_processes = (os.cpu_count() or 1) // max(args.workers, 1)
+    os.environ.setdefault("AIRDEF_MC_PROCESSES", str(mc_processes if mc_processes > 1 else 0))
+
+    store = None
+    try:
+        if not args.no_store:
+            version = artifact_fingerprint(data_dir, model_dir)
+            store = build_store(read_csv_frames(data_dir), args.store_root, version)
+            os.environ["AIRDEF_SHARED_STORE"] = store
+            forests = []
+            if os.environ.get("AIRDEF_TREE_BACKEND", "flat") == "flat":
+                forests = share_forests(store, model_dir)
+            print(f"Shared store: {store} ({store_size(store) / 1e6:.1f} MB, version {version}, "
+                  f"forests {', '.join(forests) or 'none'})")
+
+        uvicorn.run("src.main:app", host=args.host, port=args.port, workers=args.workers)
+    finally:
+        if store:
+            shutil.rmtree(store, ignore_errors=True)  # ours alone (see build_store())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+DRDO Air Defence ML Project
+Shared-memory copy of the parsed data frames for multi-worker serving.
+
+The launcher (src/serve.py) parses the CSVs once and writes them as a
+columnar store (see src/columnar.py) under /dev/shm. Each worker maps the
+numeric columns read-only, so that data lives once in the page cache no
+matter how many workers run; only text and category columns are decoded
+per worker. The validated flat forests (src/forest.py) are saved next to
+the frames under forests/<model> and mapped the same way.
+
+Each launcher writes its own store (the directory name carries its pid),
+so removing it on exit never pulls files from under another launcher.
+"""
+
+import os
+import tempfile
+
+from .columnar import StoreError, read_store, write_store
+
+FORESTS_DIR = "forests"
+
+
+def default_store_root() -> str:
+    """tmpfs where available, so the store never touches disk."""
+    return "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+
+
+def build_store(frames: dict, root: str, version: str) -> str:
+    """
+    Write frames to <root>/airdef-<version>-<pid> and return that path.
+    Writes go to a temp directory that is renamed into place, so readers
+    never see half a store.
+    """
+    return write_store(frames, os.path.join(root, f"airdef-{version}-{os.getpid()}"), {"version": version})
+
+
+def forest_path(store: str, name: str) -> str:
+    """Directory holding model name's flat forest inside a store."""
+    return os.path.join(store, FORESTS_DIR, name)
+
+
+def load_store(path: str, version: str):
+    """
+    Frames backed by the store's memory-mapped columns, or None when the
+    store is missing or was built from a different data version.
+    Numeric columns are read-only views; copy before mutating.
+    """
+    try:
+        return read_store(path, {"version": version})
+    except StoreError:
+        return None
+
+
+def store_size(path: str) -> int:
+    """Bytes used by a store directory."""
+    return sum(
+        os.path.getsize(os.path.join(d, f))
+        for d, _, files in os.walk(path) for f in files
+    )
@@ -0,0 +1,59 @@
+"""
+DRDO Air Defence ML Project
+Nearest-neighbour index over the system catalogue in model 1's feature space.
+"""
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+# Filtered queries with at most this many candidates are answered by a
+# direct distance scan over them instead of the tree
+BRUTE_FORCE_MAX = 8192
+
+
+class SimilarityIndex:
+    """
+    Systems nearest to a given one by Euclidean distance over the scaled
+    model 1 features (the 11 numeric specs plus the encoded system_type,
+    standardised by scaler_m1), built once at load time.
+
+    Unfiltered queries go straight to a KD-tree. Filtered queries scan
+    small candidate sets directly and otherwise widen the tree query until
+    enough candidates pass the filter. Ties are broken by row position.
+    """
+
+    def __init__(self, X: np.ndarray):
+        self.X = np.ascontiguousarray(X, dtype=np.float32)
+        self.tree = cKDTree(self.X) if len(self.X) else None
+
+    def __len__(self):
+        return len(self.X)
+
+    def query(self, pos: int, k: int, mask: np.ndarray = None) -> tuple:
+        """
+        (positions, distances) of the k systems nearest to row pos, nearest
+        first, excluding pos itself and, if mask is given, rows where it is False.
+        """
+        if mask is not None:
+            candidates = np.flatnonzero(mask)
+            candidates = candidates[candidates != pos]
+            if len(candidates) <= BRUTE_FORCE_MAX:
+                diff = self.X[candidates].astype(np.float64) - self.X[pos].astype(np.float64)
+                return _nearest(candidates, np.sqrt(np.einsum("ij,ij->i", diff, diff)), k)
+
+        n = len(self.X)
+        want = k + 1 if mask is None else max(4 * (k + 1), 64)
+        while True:
+            dist, ind = self.tree.query(self.X[pos], k=min(want, n))
+            dist, ind = np.atleast_1d(dist), np.atleast_1d(ind)
+            keep = ind != pos
+            if mask is not None:
+                keep &= mask[ind]
+            if keep.sum() >= k or want >= n:
+                return _nearest(ind[keep], dist[keep], k)
+            want *= 4
+
+
+def _nearest(positions: np.ndarray, distances: np.ndarray, k: int) -> tuple:
+    order = np.lexsort((positions, distances))[:k]
+    return positions[order], distances[order]
@@ -6,24 +6,29 @@ Run this to test all endpoints and identify failures
 
 import requests
 import json
+import os
 import sys
 from time import sleep
 
 BASE_URL = "http://localhost:8000"
+# /api/admin/* answer 403 unless the server has a token (sent here) or AIRDEF_ADMIN_OPEN=1
+ADMIN_TOKEN = os.environ.get("AIRDEF_ADMIN_TOKEN")
+HEADERS = {"X-Admin-Token": ADMIN_TOKEN} if ADMIN_TOKEN else {}
+ADMIN_STATUS = 200 if ADMIN_TOKEN or os.environ.get("AIRDEF_ADMIN_OPEN") == "1" else 403
 
-def test_endpoint(method, path, data=None, description=""):
-    """Test a single endpoint and report result"""
+def test_endpoint(method, path, data=None, description="", expected=200):
+    """Test a single endpoint and report result (expected: the status that counts as a pass)"""
     url = f"{BASE_URL}{path}"
     
     try:
         if method == "GET":
-            response = requests.get(url, timeout=10)
+            response = requests.get(url, headers=HEADERS, timeout=10)
         elif method == "POST":
-            response = requests.post(url, json=data, timeout=10)
+            response = requests.post(url, json=data, headers=HEADERS, timeout=10)
         else:
             raise ValueError(f"Unsupported method: {method}")
         
-        if response.status_code == 200:
+        if response.status_code == expected:
             print(f"✅ {method:4} {path:50} OK")
             return True
         else:
@@ -50,7 +55,7 @@ def main():
     sleep(0.5)
     
     tests = [
-        # (method, path, data, description)
+        # (method, path, data, description[, expected status])
         ("GET",  "/",                                   None,        "Health Check"),
         ("GET",  "/api/stats/overview",                 None,        "Dashboard Stats"),
         ("GET",  "/api/models/info",                    None,        "Model Info"),
@@ -60,9 +65,26 @@ def main():
         ("GET",  "/api/countries/India",                None,        "India Profile"),
         ("GET",  "/api/systems",                        None,        "All Systems"),
         ("GET",  "/api/systems?system_name=Rafale",     None,        "Systems Search by Name"),
+        ("GET",  "/api/systems?min_range=300&max_speed=6000&min_year=2000",
+                 None,
+                 "Systems by Spec Ranges"),
+        ("GET",  "/api/systems?limit=10&fields=system_id,system_name,threat_level",
+                 None,
+                 "Systems Page (projected)"),
+        ("GET",  "/api/systems?limit=10&fields=predicted_classification,prediction_confidence",
+                 None,
+                 "Systems Page (prediction fields only)"),
+        ("GET",  "/api/systems?fields=,",               None,        "Systems Page (empty fields rejected)", 400),
         ("GET",  "/api/systems/names?q=ra",             None,        "System Names Autocomplete"),
         ("GET",  "/api/systems/by-name/Rafale%20(IAF)", None,        "System by Name"),
+        ("GET",  "/api/systems/ADS_001/similar?k=5",   None,        "Similar Systems"),
+        ("GET",  "/api/systems/ADS_001/similar?k=5&system_type=SAM_System",
+                 None,
+                 "Similar Systems (filtered by type)"),
         ("GET",  "/api/compare?country1=India&country2=China", None, "Country Comparison"),
+        ("GET",  "/api/compare/multi?countries=India,China,Pakistan,USA",
+                 None,
+                 "Multi-Country Comparison"),
         ("GET",  "/api/map/zones",                      None,        "Map Zones"),
         ("GET",  "/api/country/China/insights",         None,        "China Insights"),
         ("GET",  "/api/country/Pakistan/insights",      None,        "Pakistan Insights"),
@@ -72,20 +94,47 @@ def main():
         ("GET",  "/api/predict/war?attacker_country=Pakistan&defender_country=India",
                  None,
                  "War Prediction (Pakistan vs India)"),
+        ("GET",  "/api/predict/war?attacker_country=China&defender_country=India&samples=10000&seed=1",
+                 None,
+                 "War Prediction with Uncertainty Bands"),
+        ("POST", "/api/predict/war/batch",
+                 {"pairs": [{"attacker_country": "China", "defender_country": "India"},
+                            {"attacker_country": "Pakistan", "defender_country": "India"}]},
+                 "Batch War Prediction (pairs)"),
+        ("POST", "/api/predict/war/batch",
+                 {"all_pairs": True},
+                 "Batch War Prediction (all pairs)"),
+        ("POST", "/api/simulate/war",
+                 {"attacker_country": "China", "defender_country": "India",
+                  "axes": [{"side": "defender", "change": "fighter_count", "start": 0, "stop": 20},
+                           {"side": "defender", "change": "sam_count", "start": 0, "stop": 10}]},
+                 "War What-If Grid (fighters x SAMs)"),
         ("POST", "/api/predict/classify-system",       
                  {"system_name": "Rafale (IAF)"}, 
                  "Classify System by Name"),
         ("POST", "/api/predict/classify-system",       
                  {"system_name": "HQ-9B"},
                  "Classify Another System by Name"),
+        ("POST", "/api/predict/classify-system/batch",
+                 {"system_names": ["Rafale (IAF)", "HQ-9B"]},
+                 "Batch Classify Systems by Name"),
+        ("POST", "/api/predict/classify-system/batch",
+                 {"country": "India"},
+                 "Batch Classify Systems by Country"),
+        ("POST", "/api/predict/classify-system/batch",
+                 {"system_names": ["HQ-9B"] * 1001},
+                 "Batch Classify over the name limit", 400),
+        ("GET",  "/api/admin/status",                   None,        "Data/Model Version Status", ADMIN_STATUS),
+        ("POST", "/api/admin/reload?wait=true",         None,        "Reload (no-op when unchanged)", ADMIN_STATUS),
+        ("GET",  "/metrics",                            None,        "Prometheus Metrics"),
     ]
     
     passed = 0
     failed = 0
     
-    for i, (method, path, data, desc) in enumerate(tests, 1):
+    for i, (method, path, data, desc, *expected) in enumerate(tests, 1):
         print(f"\nTest {i}/{len(tests)}: {desc}")
-        if test_endpoint(method, path, data, desc):
+        if test_endpoint(method, path, data, desc, *expected):
             passed += 1
         else:
             failed += 1